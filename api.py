@@ -6,8 +6,12 @@
 """
 
 from image_generator import generate_titles_images
+from title_autocomplete import TitleAutocomplete
 from typing import List, Optional
 
+# 自动补全引擎（首次调用时从数据库构建）
+_autocomplete: Optional[TitleAutocomplete] = None
+
 
 def generate_title_images(
     title_name: Optional[str] = None,
@@ -76,6 +80,35 @@ def generate_title_images(
         }
 
 
+def suggest_titles(prefix: str, limit: int = 10) -> List[str]:
+    """
+    根据输入前缀返回候选称号名称（用于输入时的自动补全）
+
+    参数:
+        prefix: 已输入的称号名称前缀（支持全角/半角、平假名/片假名混用）
+        limit: 返回数量上限
+
+    返回:
+        按 可获得 > 稀有度 排序的称号名称列表
+    """
+    global _autocomplete
+    if _autocomplete is None:
+        _autocomplete = TitleAutocomplete.from_db()
+    return _autocomplete.suggest_names(prefix, limit)
+
+
+def refresh_title_suggestions() -> int:
+    """
+    抓取数据后由使用补全的进程（如机器人）调用，增量更新自动补全索引
+
+    返回:
+        更新的记录数；索引尚未构建时返回 0（下次补全时直接从数据库构建）
+    """
+    if _autocomplete is None:
+        return 0
+    return _autocomplete.refresh()
+
+
 # 命令行接口
 if __name__ == "__main__":
     import sys
@@ -91,6 +124,11 @@ if __name__ == "__main__":
         rarity_color = None
         output_dir = "output"
         
+        if sys.argv[1] == "--suggest" and len(sys.argv) > 2:
+            for name in suggest_titles(sys.argv[2]):
+                print(f"  {name}")
+            sys.exit(0)
+
         i = 1
         while i < len(sys.argv):
             if sys.argv[i] == "--title" and i + 1 < len(sys.argv):
@@ -0,0 +1,132 @@
+"""
+称号获得条件解析
+
+将 obtain_condition 中的自由文本解析为结构化字段（曲名、难度、达成类型、次数、段位合格等级），
+用于写入 title_conditions 表并建立索引。
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+# 难度名称（与 Wiki 上的写法一致）
+DIFFICULTIES = ("かんたん", "ふつう", "むずかしい", "おに")
+# 裏譜面单独作为一个难度
+URA_DIFFICULTY = "おに(裏)"
+
+_CLEAR = r"ドンダフルコンボ|フルコンボ|クリア"
+
+# 例: 幕末維新譚を難易度おにでフルコンボ
+_SONG_WITH_DIFFICULTY = re.compile(
+    rf"^(?P<song>.+?)を難易度(?P<difficulty>{'|'.join(DIFFICULTIES)})で(?P<clear>{_CLEAR})$"
+)
+# 例: SUPERNOVA(裏)をフルコンボ
+_URA_SONG = re.compile(rf"^(?P<song>[^、]+?)\(裏\)を(?P<clear>{_CLEAR})$")
+# 例: 復活！ホワイト超人をフルコンボで金合格
+_DAN_COURSE = re.compile(
+    r"^(?P<song>.+?)を(?:(?P<clear>ドンダフルコンボ|フルコンボ)で)?(?P<grade>金合格|合格)$"
+)
+# 例: 恋の処方箋をクリア / 幽玄ノ乱をプレイ
+_SONG_ONLY = re.compile(rf"^(?P<song>[^、]+?)を(?P<clear>{_CLEAR}|プレイ)$")
+# 例: AIバトル演奏で800回勝利 / 金冠を500個以上 / 挑戦状で10連勝
+# （"5回目プレイ" 表示第几次，不是次数阈值）
+_COUNT = re.compile(r"(?P<count>\d+)(?P<unit>回(?!目)|個|連勝)")
+
+# 曲名前面的限定条件，解析时去掉
+_QUALIFIER_PREFIX = re.compile(
+    r"^(?:"
+    # 例: 2015年9月に / 2014/8/9～8/22の間に / 2025/7/30～9/28に
+    r"\d{4}(?:年\d{1,2}月|/\d{1,2}/\d{1,2}～[\d/]+(?:の間)?)に"
+    # 例: BLUE 1.05~10.04またはGREEN 1.04~13.02で / RED 5.08で
+    r"|(?:(?:RED|YELLOW|BLUE|GREEN) [\d.~]+(?:または|か)?)+で"
+    # 例: 1P側で / 1プレイ内で
+    r"|[12]P側で|1プレイ内で"
+    # 例: マイどんの名前を「みらい」にして
+    r"|マイどんの名前を「[^」]*」にして"
+    # 例: 残り時間を奇数ゾロ目,22,44のいずれかに止まるように選択して
+    r"|残り時間を.+?選択して"
+    r")"
+)
+# 去掉限定条件后仍包含这些内容时，说明不是单一曲名
+_NOT_A_SONG = ("した後に", "として", "のどちらか", "1プレイ内", "収録曲", "全曲")
+# 在某月 "太鼓の達人をプレイ" 指的是游戏本身
+_GAME_NAME = "太鼓の達人"
+
+
+class ParsedCondition(NamedTuple):
+    """解析后的获得条件，无法识别的字段为 None"""
+
+    song_name: Optional[str] = None
+    difficulty: Optional[str] = None
+    clear_type: Optional[str] = None
+    count: Optional[int] = None
+    count_unit: Optional[str] = None
+    grade: Optional[str] = None  # 段位道场的合格等级（合格/金合格）
+
+
+def _clean_song_name(song: str) -> Optional[str]:
+    """去掉曲名前面的日期、版本等限定条件，不是单一曲名时返回 None"""
+    while True:
+        match = _QUALIFIER_PREFIX.match(song)
+        if not match:
+            break
+        song = song[match.end():]
+
+    if not song or song == _GAME_NAME or any(marker in song for marker in _NOT_A_SONG):
+        return None
+    return song
+
+
+def parse_obtain_condition(obtain_condition: str) -> ParsedCondition:
+    """
+    解析称号获得条件
+
+    参数:
+        obtain_condition: 获得条件原文
+
+    返回:
+        ParsedCondition，无法识别时所有字段均为 None
+    """
+    text = (obtain_condition or "").strip()
+    if not text:
+        return ParsedCondition()
+
+    match = _SONG_WITH_DIFFICULTY.match(text)
+    if match:
+        return ParsedCondition(
+            song_name=_clean_song_name(match.group("song")),
+            difficulty=match.group("difficulty"),
+            clear_type=match.group("clear"),
+        )
+
+    match = _URA_SONG.match(text)
+    if match:
+        return ParsedCondition(
+            song_name=_clean_song_name(match.group("song")),
+            difficulty=URA_DIFFICULTY,
+            clear_type=match.group("clear"),
+        )
+
+    match = _DAN_COURSE.match(text)
+    if match:
+        # 段位道场: 连击要求（可选）和合格等级分别记录
+        return ParsedCondition(
+            song_name=_clean_song_name(match.group("song")),
+            clear_type=match.group("clear"),
+            grade=match.group("grade"),
+        )
+
+    # 含次数的条件（如 "太鼓を50回プレイ"）不视为曲名
+    match = _COUNT.search(text)
+    if match:
+        return ParsedCondition(
+            count=int(match.group("count")), count_unit=match.group("unit")
+        )
+
+    match = _SONG_ONLY.match(text)
+    if match:
+        return ParsedCondition(
+            song_name=_clean_song_name(match.group("song")),
+            clear_type=match.group("clear"),
+        )
+
+    return ParsedCondition()
@@ -0,0 +1,277 @@
+"""
+多来源称号抓取
+
+维护一个数据来源注册表，使用有上限的线程池并发抓取页面，
+对每个主机单独限速，并在失败时按指数退避重试。
+抓取到的页面在主线程中解析并写入数据库（SQLite 写入保持单线程）。
+
+base_url 可以替换为本地服务器地址，便于离线使用保存好的页面进行测试。
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urljoin, urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+
+from taiko_titles_db import DEFAULT_SOURCE, save_title_to_db
+
+WIKI_BASE_URL = "https://wikiwiki.jp/taiko-fumen/"
+HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+
+class Source(NamedTuple):
+    """数据来源: name 写入 titles.source，path 为相对 base_url 的页面路径"""
+
+    name: str
+    path: str
+    description: str = ""
+
+
+# 数据来源注册表
+SOURCES: Dict[str, Source] = {}
+
+
+def register_source(name: str, path: str, description: str = "") -> Source:
+    """
+    注册数据来源
+
+    参数:
+        name: 来源名称（写入 titles.source）
+        path: Wiki 页面路径（未编码），如 "作品/新AC/段位・称号の一覧"
+        description: 说明
+
+    返回:
+        注册的 Source
+    """
+    source = Source(name, path, description)
+    SOURCES[name] = source
+    return source
+
+
+register_source(DEFAULT_SOURCE, "作品/新AC/段位・称号の一覧", "新AC 段位・称号一览")
+
+
+def source_url(source: Source, base_url: str = WIKI_BASE_URL) -> str:
+    """拼接来源页面的完整 URL"""
+    return urljoin(base_url, quote(source.path))
+
+
+class HostRateLimiter:
+    """按主机限速: 同一主机的两次请求之间至少间隔 min_interval 秒"""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_allowed: Dict[str, float] = {}
+
+    def wait(self, url: str):
+        """阻塞直到允许向该 URL 的主机发送请求"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            allowed_at = max(now, self._next_allowed.get(host, 0.0))
+            self._next_allowed[host] = allowed_at + self.min_interval
+        delay = allowed_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """每个线程使用独立的 Session（复用连接）"""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        _thread_local.session = session
+    return session
+
+
+def fetch_page(
+    url: str,
+    rate_limiter: HostRateLimiter,
+    retries: int = 3,
+    backoff: float = 1.0,
+    timeout: float = 30.0,
+) -> str:
+    """
+    抓取单个页面，失败时按指数退避重试
+
+    参数:
+        url: 页面地址
+        rate_limiter: 主机限速器
+        retries: 最大重试次数
+        backoff: 首次重试前的等待秒数，之后每次翻倍
+        timeout: 单次请求超时秒数
+
+    返回:
+        页面 HTML 文本
+    """
+    attempt = 0
+    while True:
+        rate_limiter.wait(url)
+        try:
+            resp = _get_session().get(url, timeout=timeout)
+            # 429 和 5xx 视为可重试错误
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise requests.HTTPError(
+                    f"HTTP {resp.status_code}", response=resp
+                )
+            resp.raise_for_status()
+            resp.encoding = resp.apparent_encoding  # 处理日文乱码
+            return resp.text
+        except requests.RequestException as e:
+            response = getattr(e, "response", None)
+            retryable = response is None or (
+                response.status_code == 429 or response.status_code >= 500
+            )
+            if not retryable or attempt >= retries:
+                raise
+
+            delay = backoff * (2**attempt)
+            retry_after = (
+                response.headers.get("Retry-After") if response is not None else None
+            )
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+
+            attempt += 1
+            print(f"抓取失败 {url}: {e}，{delay:.1f} 秒后重试 ({attempt}/{retries})")
+            time.sleep(delay)
+
+
+def parse_title_rows(html: str) -> List[Tuple[str, int, str, str, str]]:
+    """
+    解析称号一览页面
+
+    参数:
+        html: 页面 HTML
+
+    返回:
+        [(title_name, is_available, rarity_color, obtain_condition, tips), ...]
+    """
+    soup = BeautifulSoup(html, "lxml")
+    tbody = soup.select_one("#content .h-scrollable table tbody")
+
+    # 检查找到的内容
+    if not tbody:
+        print("未找到目标内容")
+        return []
+
+    titles = []
+    for idx, row in enumerate(tbody.find_all("tr"), 1):
+        try:
+            # 获取所有单元格
+            cells = row.find_all("td")
+            if len(cells) < 3:
+                continue
+
+            # 0: 看颜色是否是grey表示称号是否可获得
+            # 1: 用于看颜色,表示称号的颜色(稀有度)
+            # 2: 称号名称
+            # 3: 称号获得条件
+            # 4: 关于称号的提示,可能没有
+
+            # 检查是否可获得
+            availability_style = cells[0].attrs.get("style", "")
+            is_available = 0 if "grey" in availability_style else 1
+
+            # 获取稀有度颜色
+            rarity_style = cells[1].attrs.get("style", "")
+            rarity_color = ""
+            match = re.search(r"background-color:\s*([^;]+)", rarity_style)
+            if match:
+                rarity_color = match.group(1).strip()
+
+            # 获取称号名称
+            title_name = cells[2].get_text(strip=True)
+
+            # 获取获得条件
+            obtain_condition = cells[3].get_text(strip=True) if len(cells) > 3 else ""
+
+            # 获取提示信息
+            tips = cells[4].get_text(strip=True) if len(cells) > 4 else ""
+
+            titles.append(
+                (title_name, is_available, rarity_color, obtain_condition, tips)
+            )
+
+        except Exception as e:
+            print(f"处理第 {idx} 行时出错: {e}")
+            continue
+
+    return titles
+
+
+def crawl(
+    source_names: Optional[Iterable[str]] = None,
+    base_url: str = WIKI_BASE_URL,
+    max_workers: int = 4,
+    min_interval: float = 1.0,
+    retries: int = 3,
+    backoff: float = 1.0,
+) -> Dict[str, int]:
+    """
+    并发抓取多个来源并写入数据库
+
+    参数:
+        source_names: 要抓取的来源名称（默认全部已注册来源）
+        base_url: Wiki 根地址（可替换为本地服务器地址）
+        max_workers: 最大并发数
+        min_interval: 同一主机请求的最小间隔秒数
+        retries: 每个页面的最大重试次数
+        backoff: 重试退避的初始秒数
+
+    返回:
+        {来源名称: 写入的称号数量}，抓取失败的来源不包含在内
+    """
+    if source_names is None:
+        source_names = list(SOURCES)
+    sources = []
+    for name in source_names:
+        if name not in SOURCES:
+            raise ValueError(f"未注册的数据来源: {name}")
+        sources.append(SOURCES[name])
+
+    rate_limiter = HostRateLimiter(min_interval)
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            (
+                source,
+                executor.submit(
+                    fetch_page,
+                    source_url(source, base_url),
+                    rate_limiter,
+                    retries,
+                    backoff,
+                ),
+            )
+            for source in sources
+        ]
+
+        # 按注册顺序在主线程中写库
+        for source, future in futures:
+            print(f"正在抓取数据: {source.name}")
+            try:
+                html = future.result()
+            except requests.RequestException as e:
+                print(f"抓取 {source.name} 失败: {e}")
+                continue
+
+            titles = parse_title_rows(html)
+            print(f"找到 {len(titles)} 条称号数据")
+            for title in titles:
+                save_title_to_db(*title, source=source.name)
+            results[source.name] = len(titles)
+
+    print("数据抓取并存储完成!")
+    return results
@@ -0,0 +1,187 @@
+"""
+称号框合成
+
+resources/ 中只有少数几种稀有度颜色的称号框。对于其他颜色，
+以 BASE_FRAME 为底图，使用 NumPy 对整张图片做向量化的 HSV 变换:
+- 色相整体旋转到目标颜色的色相
+- 饱和度按目标颜色与底图主色的比例缩放
+- 明度和透明度保持不变
+
+合成结果缓存到 resources/generated/（同时在进程内缓存），
+也可以批量为数据库中出现的所有颜色预先生成:
+    python frame_synthesis.py
+"""
+
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageColor
+
+from taiko_titles_db import DB_NAME
+
+RESOURCES_DIR = Path("resources")
+GENERATED_DIR = RESOURCES_DIR / "generated"
+# 合成用的底图（数据库中最常见的稀有度）
+BASE_FRAME = RESOURCES_DIR / "#ded523.png"
+
+# 饱和度低于该值的像素不参与主色计算（白色高光、黑色描边等）
+_SATURATION_THRESHOLD = 0.25
+
+
+def frame_filename(rarity_color: str) -> str:
+    """称号框文件名（与 resources/ 中的命名一致，如 #ded523.png）"""
+    return f"#{rarity_color.lower().replace('#', '')}.png"
+
+
+def rgb_to_hsv(rgb: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """向量化 RGB → HSV，输入为 [..., 3] 的 0~1 浮点数组"""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maxc = rgb.max(axis=-1)
+    minc = rgb.min(axis=-1)
+    delta = maxc - minc
+
+    v = maxc
+    s = np.divide(delta, maxc, out=np.zeros_like(maxc), where=maxc > 0)
+
+    safe_delta = np.where(delta > 0, delta, 1.0)
+    rc = (maxc - r) / safe_delta
+    gc = (maxc - g) / safe_delta
+    bc = (maxc - b) / safe_delta
+    h = np.select(
+        [delta == 0, r == maxc, g == maxc],
+        [0.0, bc - gc, 2.0 + rc - bc],
+        default=4.0 + gc - rc,
+    )
+    h = (h / 6.0) % 1.0
+    return h, s, v
+
+
+def hsv_to_rgb(h: np.ndarray, s: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """向量化 HSV → RGB，返回 [..., 3] 的 0~1 浮点数组"""
+    i = np.floor(h * 6.0)
+    f = h * 6.0 - i
+    i = i.astype(np.int64) % 6
+
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+
+    conditions = [i == k for k in range(6)]
+    r = np.select(conditions, [v, q, p, p, t, v])
+    g = np.select(conditions, [t, v, v, q, p, p])
+    b = np.select(conditions, [p, p, t, v, v, q])
+    return np.stack([r, g, b], axis=-1)
+
+
+@lru_cache(maxsize=1)
+def _load_base_frame(base_path: str, mtime: float):
+    """加载底图并计算其主色（饱和像素的圆周平均色相和中位饱和度）"""
+    rgba = np.asarray(Image.open(base_path).convert("RGBA"), dtype=np.float64) / 255.0
+    h, s, v = rgb_to_hsv(rgba[..., :3])
+
+    mask = (rgba[..., 3] > 0.5) & (s > _SATURATION_THRESHOLD)
+    if mask.any():
+        angles = h[mask] * 2 * np.pi
+        weights = s[mask]
+        base_hue = (
+            np.arctan2((np.sin(angles) * weights).sum(), (np.cos(angles) * weights).sum())
+            / (2 * np.pi)
+        ) % 1.0
+        base_saturation = float(np.median(s[mask]))
+    else:
+        base_hue, base_saturation = 0.0, 1.0
+
+    return rgba, h, s, v, float(base_hue), base_saturation
+
+
+def recolor_frame(rarity_color: str, base_path: Optional[Path] = None) -> Image.Image:
+    """
+    将底图重新着色为指定稀有度颜色
+
+    参数:
+        rarity_color: CSS 颜色（如 "#6b21fe"、"crimson"）
+        base_path: 底图路径（默认为 BASE_FRAME）
+
+    返回:
+        RGBA 称号框图片
+    """
+    base_path = base_path or BASE_FRAME
+    target = np.array(ImageColor.getrgb(rarity_color)[:3], dtype=np.float64) / 255.0
+    target_hue, target_saturation, _ = rgb_to_hsv(target)
+
+    rgba, h, s, v, base_hue, base_saturation = _load_base_frame(
+        str(base_path), base_path.stat().st_mtime
+    )
+
+    new_h = (h + (float(target_hue) - base_hue)) % 1.0
+    new_s = np.clip(s * (float(target_saturation) / base_saturation), 0.0, 1.0)
+    rgb = hsv_to_rgb(new_h, new_s, v)
+
+    out = np.concatenate([rgb, rgba[..., 3:]], axis=-1)
+    return Image.fromarray(np.round(out * 255.0).astype(np.uint8), "RGBA")
+
+
+def synthesize_frame(rarity_color: str) -> Optional[Path]:
+    """
+    返回指定颜色的合成称号框路径（不存在或底图更新时重新生成）
+
+    参数:
+        rarity_color: 稀有度颜色
+
+    返回:
+        合成称号框路径，颜色无法解析或底图缺失时返回 None
+    """
+    if not BASE_FRAME.exists():
+        print(f"未找到合成用的底图: {BASE_FRAME}")
+        return None
+    # 底图的修改时间作为缓存键的一部分，底图更新后长期运行的进程也会重新合成
+    return _synthesize_frame(rarity_color, str(BASE_FRAME), BASE_FRAME.stat().st_mtime)
+
+
+@lru_cache(maxsize=None)
+def _synthesize_frame(rarity_color: str, base_path: str, base_mtime: float) -> Optional[Path]:
+    frame_path = GENERATED_DIR / frame_filename(rarity_color)
+    if frame_path.exists() and frame_path.stat().st_mtime >= base_mtime:
+        return frame_path
+
+    try:
+        frame = recolor_frame(rarity_color, Path(base_path))
+    except ValueError as e:
+        print(f"无法解析稀有度颜色 {rarity_color}: {e}")
+        return None
+
+    GENERATED_DIR.mkdir(parents=True, exist_ok=True)
+    frame.save(frame_path)
+    print(f"已合成称号框: {frame_path}")
+    return frame_path
+
+
+def pregenerate_frames(db_name: str = DB_NAME) -> List[Path]:
+    """为数据库中所有没有现成称号框的稀有度颜色预先生成称号框"""
+    conn = sqlite3.connect(db_name)
+    try:
+        colors = [
+            row[0]
+            for row in conn.execute(
+                "SELECT DISTINCT rarity_color FROM titles WHERE rarity_color != ''"
+            )
+        ]
+    finally:
+        conn.close()
+
+    generated = []
+    for color in colors:
+        if (RESOURCES_DIR / frame_filename(color)).exists():
+            continue
+        frame_path = synthesize_frame(color)
+        if frame_path:
+            generated.append(frame_path)
+    return generated
+
+
+if __name__ == "__main__":
+    frames = pregenerate_frames()
+    print(f"共合成 {len(frames)} 个称号框")
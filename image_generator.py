@@ -1,47 +1,85 @@
 import sqlite3
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterable, Iterator, List, NamedTuple, Tuple, Optional
+
+from frame_synthesis import synthesize_frame
+from image_store import ImageStore, content_key, file_digest
+from taiko_titles_db import TITLE_COLUMNS
 
 DB_NAME = "taiko_titles.db"
 
+# 渲染逻辑变更时递增，使旧的缓存图片失效
+RENDER_VERSION = 2
 
-def query_titles_by_name_and_color(
+# 边距和间距
+PADDING = 40
+LINE_SPACING = 15
+SECTION_SPACING = 30
+
+# 字体查找顺序: 优先使用项目中的字体，其次尝试系统字体
+FONT_PATHS = [
+    Path("resources") / "FOT-大江戸勘亭流 Std E.otf",
+    "C:\\Windows\\Fonts\\msgothic.ttc",  # MS Gothic (支持日文)
+    "C:\\Windows\\Fonts\\msmincho.ttc",  # MS Mincho
+    "C:\\Windows\\Fonts\\yugothm.ttc",  # Yu Gothic Medium
+    "C:\\Windows\\Fonts\\YuGothR.ttc",  # Yu Gothic Regular
+    "C:\\Windows\\Fonts\\meiryo.ttc",  # Meiryo
+]
+
+
+def iter_titles_by_name_and_color(
     title_name: Optional[str] = None, rarity_color: Optional[str] = None
-) -> List[Tuple]:
+) -> Iterator[Tuple]:
     """
-    根据称号名称和/或稀有度颜色查询称号
+    根据称号名称和/或稀有度颜色逐行查询称号（不一次性读取全部结果）
 
     参数:
         title_name: 称号名称（可选，使用模糊匹配）
         rarity_color: 稀有度颜色（可选）
 
     返回:
-        符合条件的称号列表
+        称号数据元组的迭代器
     """
     conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+    try:
+        cursor = conn.cursor()
 
-    # 构建动态查询
-    query = "SELECT * FROM titles WHERE 1=1"
-    params = []
+        # 构建动态查询
+        query = f"SELECT {TITLE_COLUMNS} FROM titles WHERE 1=1"
+        params = []
 
-    if title_name:
-        # 使用 LIKE 进行模糊搜索
-        query += " AND title_name LIKE ?"
-        params.append(f"%{title_name}%")
+        if title_name:
+            # 使用 LIKE 进行模糊搜索
+            query += " AND title_name LIKE ?"
+            params.append(f"%{title_name}%")
 
-    if rarity_color:
-        query += " AND rarity_color = ?"
-        params.append(rarity_color)
+        if rarity_color:
+            query += " AND rarity_color = ?"
+            params.append(rarity_color)
 
-    query += " ORDER BY id"
+        query += " ORDER BY id"
 
-    cursor.execute(query, params)
-    titles = cursor.fetchall()
+        yield from cursor.execute(query, params)
+    finally:
+        conn.close()
 
-    conn.close()
-    return titles
+
+def query_titles_by_name_and_color(
+    title_name: Optional[str] = None, rarity_color: Optional[str] = None
+) -> List[Tuple]:
+    """
+    根据称号名称和/或稀有度颜色查询称号
+
+    参数:
+        title_name: 称号名称（可选，使用模糊匹配）
+        rarity_color: 稀有度颜色（可选）
+
+    返回:
+        符合条件的称号列表
+    """
+    return list(iter_titles_by_name_and_color(title_name, rarity_color))
 
 
 def wrap_text(text: str, font, max_width: int) -> List[str]:
@@ -68,6 +106,29 @@ def wrap_text(text: str, font, max_width: int) -> List[str]:
     return lines
 
 
+def find_font_path() -> Optional[str]:
+    """返回第一个存在的字体路径，找不到时返回 None"""
+    for font_path in FONT_PATHS:
+        if Path(font_path).exists():
+            return str(font_path)
+    return None
+
+
+def title_frame_path(rarity_color: str) -> Path:
+    """根据稀有度颜色返回称号框图片路径（如 resources/#ded523.png）"""
+    # 清理颜色值作为文件名
+    color_filename = rarity_color.lower().replace("#", "")
+    return Path("resources") / f"#{color_filename}.png"
+
+
+def resolve_frame_path(rarity_color: str) -> Optional[Path]:
+    """返回称号框路径: 优先使用 resources 中的图片，没有时使用合成的称号框"""
+    frame_path = title_frame_path(rarity_color)
+    if frame_path.exists():
+        return frame_path
+    return synthesize_frame(rarity_color)
+
+
 def load_title_frame(rarity_color: str) -> Optional[Image.Image]:
     """
     根据稀有度颜色加载对应的称号框图片
@@ -78,230 +139,301 @@ def load_title_frame(rarity_color: str) -> Optional[Image.Image]:
     返回:
         称号框图片，如果找不到则返回 None
     """
-    # 清理颜色值作为文件名
-    color_filename = rarity_color.lower().replace("#", "")
-    frame_path = Path("resources") / f"#{color_filename}.png"
+    frame_path = resolve_frame_path(rarity_color)
 
-    if frame_path.exists():
+    if frame_path:
         try:
-            return Image.open(frame_path)
+            return _open_frame(str(frame_path), frame_path.stat().st_mtime)
         except Exception as e:
             print(f"加载称号框失败 {frame_path}: {e}")
             return None
     else:
-        print(f"未找到称号框: {frame_path}")
+        print(f"未找到称号框: {title_frame_path(rarity_color)}")
         return None
 
 
-def generate_title_image(
+class TitleLayout(NamedTuple):
+    """单张称号图片的排版结果（计算一次，绘制时直接使用）"""
+
+    title_name: str
+    is_available: int
+    title_frame: Image.Image
+    font_title: ImageFont.ImageFont
+    font_body: ImageFont.ImageFont
+    font_size_body: int
+    width: int
+    height: int
+    availability_text: str
+    condition_lines: List[str]
+    tips_lines: List[str]
+
+
+@lru_cache(maxsize=8)
+def load_fonts(font_size_title: int, font_size_body: int):
+    """
+    加载字体（优先使用 resources 文件夹中的字体），同样的字号只加载一次
+
+    返回:
+        (标题字体, 正文字体, 小号字体)
+    """
+    try:
+        font_path = find_font_path()
+
+        if font_path:
+            font_title = ImageFont.truetype(font_path, font_size_title)
+            font_body = ImageFont.truetype(font_path, font_size_body)
+            font_small = ImageFont.truetype(font_path, 20)
+        else:
+            # 如果找不到日文字体，使用默认字体
+            font_title = ImageFont.load_default()
+            font_body = ImageFont.load_default()
+            font_small = ImageFont.load_default()
+            print("警告: 未找到日文字体，使用默认字体")
+
+    except Exception as e:
+        print(f"加载字体时出错: {e}")
+        font_title = ImageFont.load_default()
+        font_body = ImageFont.load_default()
+        font_small = ImageFont.load_default()
+
+    return font_title, font_body, font_small
+
+
+def layout_title_image(
     title_data: Tuple,
-    output_path: str,
     width: int = 800,
     font_size_title: int = 32,
     font_size_body: int = 24,
-) -> str:
+) -> Optional[TitleLayout]:
     """
-    生成单个称号信息图片
+    计算称号图片的排版（换行和总高度）
 
     参数:
         title_data: 数据库查询返回的称号数据元组
-        output_path: 输出图片路径
         width: 图片宽度
         font_size_title: 标题字体大小（称号框内文字）
         font_size_body: 正文字体大小
 
     返回:
-        生成的图片路径
+        排版结果，找不到称号框时返回 None
     """
     # 解析数据
     # (id, title_name, is_available, rarity_color, obtain_condition, tips, created_at, updated_at)
-    (
-        title_id,
-        title_name,
-        is_available,
-        rarity_color,
-        obtain_condition,
-        tips,
-        created_at,
-        updated_at,
-    ) = title_data
-
-    # 设置边距和间距
-    padding = 40
-    line_spacing = 15
-    section_spacing = 30
-
-    # 加载字体（优先使用 resources 文件夹中的字体）
-    try:
-        # 优先使用项目中的字体
-        custom_font_path = Path("resources") / "FOT-大江戸勘亭流 Std E.otf"
+    _, title_name, is_available, rarity_color, obtain_condition, tips = title_data[:6]
 
-        if custom_font_path.exists():
-            font_title = ImageFont.truetype(str(custom_font_path), font_size_title)
-            font_body = ImageFont.truetype(str(custom_font_path), font_size_body)
-            font_small = ImageFont.truetype(str(custom_font_path), 20)
-        else:
-            # 备用：尝试系统字体
-            font_paths = [
-                "C:\\Windows\\Fonts\\msgothic.ttc",  # MS Gothic (支持日文)
-                "C:\\Windows\\Fonts\\msmincho.ttc",  # MS Mincho
-                "C:\\Windows\\Fonts\\yugothm.ttc",  # Yu Gothic Medium
-                "C:\\Windows\\Fonts\\YuGothR.ttc",  # Yu Gothic Regular
-                "C:\\Windows\\Fonts\\meiryo.ttc",  # Meiryo
-            ]
-
-            font_title = None
-            font_body = None
-            font_small = None
-
-            for font_path in font_paths:
-                if Path(font_path).exists():
-                    font_title = ImageFont.truetype(font_path, font_size_title)
-                    font_body = ImageFont.truetype(font_path, font_size_body)
-                    font_small = ImageFont.truetype(font_path, 20)
-                    break
-
-            if font_title is None:
-                # 如果找不到日文字体，使用默认字体
-                font_title = ImageFont.load_default()
-                font_body = ImageFont.load_default()
-                font_small = ImageFont.load_default()
-                print("警告: 未找到日文字体，使用默认字体")
-
-    except Exception as e:
-        print(f"加载字体时出错: {e}")
-        font_title = ImageFont.load_default()
-        font_body = ImageFont.load_default()
-        font_small = ImageFont.load_default()
+    font_title, font_body, _ = load_fonts(font_size_title, font_size_body)
 
     # 加载称号框
     title_frame = load_title_frame(rarity_color)
     if not title_frame:
-        return ""
-
-    # 称号框尺寸（556x90）
-    frame_width = title_frame.width
-    frame_height = title_frame.height
+        return None
 
     # 计算所需高度
-    max_text_width = width - 2 * padding
-
-    # 可取得状态
-    availability_text = "可取得: " + ("是" if is_available else "否")
-    availability_height = font_size_body + line_spacing
+    max_text_width = width - 2 * PADDING
 
     # 取得条件
     condition_lines = wrap_text(obtain_condition, font_body, max_text_width)
     condition_height = (
-        font_size_body + line_spacing + len(condition_lines) * (font_size_body + 10)
+        font_size_body + LINE_SPACING + len(condition_lines) * (font_size_body + 10)
     )
 
-    # 提示信息
+    # 提示信息（按实际绘制的缩进宽度换行）
+    tips_lines = wrap_text(tips, font_body, max_text_width - 20) if tips else []
     tips_height = 0
     if tips:
-        tips_lines = wrap_text(tips, font_body, max_text_width)
         tips_height = (
-            font_size_body + line_spacing + len(tips_lines) * (font_size_body + 10)
+            font_size_body + LINE_SPACING + len(tips_lines) * (font_size_body + 10)
         )
 
     # 总高度（包含称号框 + 信息部分）
     total_height = (
-        padding  # 顶部边距
-        + frame_height  # 称号框高度
-        + section_spacing  # 间距
-        + availability_height  # 可获得状态
-        + section_spacing
+        PADDING  # 顶部边距
+        + title_frame.height  # 称号框高度（556x90）
+        + SECTION_SPACING  # 间距
+        + font_size_body + LINE_SPACING  # 可获得状态
+        + SECTION_SPACING
         + condition_height  # 获得条件
-        + (section_spacing + tips_height if tips else 0)  # 提示信息
-        + padding  # 底部边距
+        + (SECTION_SPACING + tips_height if tips else 0)  # 提示信息
+        + PADDING  # 底部边距
+    )
+
+    return TitleLayout(
+        title_name=title_name,
+        is_available=is_available,
+        title_frame=title_frame,
+        font_title=font_title,
+        font_body=font_body,
+        font_size_body=font_size_body,
+        width=width,
+        height=int(total_height),
+        availability_text="可取得: " + ("是" if is_available else "否"),
+        condition_lines=condition_lines,
+        tips_lines=tips_lines,
     )
 
+
+def draw_title_image(layout: TitleLayout) -> Image.Image:
+    """根据排版结果绘制称号图片"""
+    width = layout.width
+    font_body = layout.font_body
+    font_size_body = layout.font_size_body
+    title_frame = layout.title_frame
+
     # 创建图片
-    img = Image.new("RGB", (width, int(total_height)), color="white")
+    img = Image.new("RGB", (width, layout.height), color="white")
     draw = ImageDraw.Draw(img)
 
     # 绘制边框
     draw.rectangle(
-        [(0, 0), (width - 1, total_height - 1)], outline=(200, 200, 200), width=2
+        [(0, 0), (width - 1, layout.height - 1)], outline=(200, 200, 200), width=2
     )
 
     # 当前Y坐标
-    current_y = padding
+    current_y = PADDING
 
     # 绘制称号框和称号文字
-    if title_frame:
-        # 将称号框居中放置
-        frame_x = (width - frame_width) // 2
-        frame_y = current_y
-
-        # 粘贴称号框
-        img.paste(
-            title_frame,
-            (frame_x, frame_y),
-            title_frame if title_frame.mode == "RGBA" else None,
-        )
+    # 将称号框居中放置
+    frame_x = (width - title_frame.width) // 2
+    frame_y = current_y
+
+    # 粘贴称号框
+    img.paste(
+        title_frame,
+        (frame_x, frame_y),
+        title_frame if title_frame.mode == "RGBA" else None,
+    )
 
-        # 在称号框上半部分居中绘制称号文字
-        # 计算文字宽度以居中
-        bbox = font_title.getbbox(title_name)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+    # 在称号框上半部分居中绘制称号文字
+    # 计算文字宽度以居中
+    bbox = layout.font_title.getbbox(layout.title_name)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
 
-        # 文字位置：框的水平居中，垂直位置在框的上半部分（约1/4处）
-        text_x = frame_x + (frame_width - text_width) // 2
-        text_y = frame_y + frame_height - 68 - (text_height // 2)
+    # 文字位置：框的水平居中，垂直位置在框的上半部分（约1/4处）
+    text_x = frame_x + (title_frame.width - text_width) // 2
+    text_y = frame_y + title_frame.height - 68 - (text_height // 2)
 
-        # 绘制黑色文字（无描边）
-        draw.text((text_x, text_y), title_name, fill=(0, 0, 0), font=font_title)
+    # 绘制黑色文字（无描边）
+    draw.text(
+        (text_x, text_y), layout.title_name, fill=(0, 0, 0), font=layout.font_title
+    )
 
-        current_y += frame_height + section_spacing
-    else:
-        # 如果没有称号框，用原来的方式显示称号名称
-        draw.text((padding, current_y), title_name, fill=(0, 0, 0), font=font_title)
-        current_y += font_size_title + section_spacing
+    current_y += title_frame.height + SECTION_SPACING
 
     # 绘制可获得状态
-    availability_color = (0, 150, 0) if is_available else (150, 0, 0)
+    availability_color = (0, 150, 0) if layout.is_available else (150, 0, 0)
     draw.text(
-        (padding, current_y), availability_text, fill=availability_color, font=font_body
+        (PADDING, current_y),
+        layout.availability_text,
+        fill=availability_color,
+        font=font_body,
     )
-    current_y += availability_height + section_spacing
-
-    # # 绘制稀有度颜色标签
-    # draw.text((padding, current_y), f"稀有度: {rarity_color}", fill=(100, 100, 100), font=font_small)
-    # current_y += font_size_body + section_spacing
+    current_y += font_size_body + LINE_SPACING + SECTION_SPACING
 
     # 绘制取得条件
-    draw.text((padding, current_y), "取得条件:", fill=(0, 0, 0), font=font_body)
+    draw.text((PADDING, current_y), "取得条件:", fill=(0, 0, 0), font=font_body)
     current_y += font_size_body + 10
 
-    for line in condition_lines:
+    for line in layout.condition_lines:
         line = (
             line.replace("おに", "鬼")
             .replace("ドンダフルコンボ", "全良")
             .replace("フルコンボ", "全連")
         )
-        draw.text((padding + 20, current_y), line, fill=(50, 50, 50), font=font_body)
+        draw.text((PADDING + 20, current_y), line, fill=(50, 50, 50), font=font_body)
         current_y += font_size_body + 10
 
     # 绘制提示信息
-    if tips:
-        current_y += section_spacing
-        draw.text((padding, current_y), "提示:", fill=(0, 0, 0), font=font_body)
+    if layout.tips_lines:
+        current_y += SECTION_SPACING
+        draw.text((PADDING, current_y), "提示:", fill=(0, 0, 0), font=font_body)
         current_y += font_size_body + 10
 
-        tips_lines = wrap_text(tips, font_body, max_text_width - 20)
-        for line in tips_lines:
+        for line in layout.tips_lines:
             draw.text(
-                (padding + 20, current_y), line, fill=(100, 100, 100), font=font_body
+                (PADDING + 20, current_y), line, fill=(100, 100, 100), font=font_body
             )
             current_y += font_size_body + 10
 
-    # 保存图片
-    img.save(output_path)
-    print(f"图片已生成: {output_path}")
+    return img
+
+
+@lru_cache(maxsize=None)
+def _open_frame(frame_path: str, mtime: float) -> Image.Image:
+    """读取称号框（每种颜色只读取一次，返回的图片为只读共享）"""
+    frame = Image.open(frame_path)
+    frame.load()
+    return frame
 
-    return output_path
+
+@lru_cache(maxsize=None)
+def _cached_file_digest(path: str, mtime: float) -> str:
+    return file_digest(path)
+
+
+def generate_title_image(
+    title_data: Tuple,
+    output_path: str,
+    width: int = 800,
+    font_size_title: int = 32,
+    font_size_body: int = 24,
+) -> str:
+    """
+    生成单个称号信息图片
+
+    参数:
+        title_data: 数据库查询返回的称号数据元组
+        output_path: 输出图片路径
+        width: 图片宽度
+        font_size_title: 标题字体大小（称号框内文字）
+        font_size_body: 正文字体大小
+
+    返回:
+        生成的图片路径，找不到称号框时返回 ""
+    """
+    layout = layout_title_image(title_data, width, font_size_title, font_size_body)
+    if layout is None:
+        return ""
+
+    # 保存后立即释放图片内存
+    with draw_title_image(layout) as img:
+        img.save(output_path, format="PNG")
+
+    return str(output_path)
+
+
+def render_inputs(title_data: Tuple, **render_options) -> Optional[dict]:
+    """
+    收集决定图片内容的全部输入，用于计算内容哈希
+
+    参数:
+        title_data: 数据库查询返回的称号数据元组
+        render_options: 传给 generate_title_image 的其他参数
+
+    返回:
+        输入字典，称号框不存在时返回 None
+    """
+    _, title_name, is_available, rarity_color, obtain_condition, tips = title_data[:6]
+
+    frame_path = resolve_frame_path(rarity_color)
+    if not frame_path:
+        return None
+
+    font_path = find_font_path()
+    return {
+        "version": RENDER_VERSION,
+        "title_name": title_name,
+        "is_available": bool(is_available),
+        "obtain_condition": obtain_condition,
+        "tips": tips or "",
+        "frame": _cached_file_digest(str(frame_path), frame_path.stat().st_mtime),
+        "font": (
+            _cached_file_digest(font_path, Path(font_path).stat().st_mtime)
+            if font_path
+            else None
+        ),
+        "options": render_options,
+    }
 
 
 def generate_titles_images(
@@ -320,9 +452,8 @@ def generate_titles_images(
     返回:
         生成的图片路径列表
     """
-    # 创建输出目录
-    output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
+    # 创建输出目录（图片按内容哈希保存，文件名为指向它的链接）
+    store = ImageStore(output_dir)
 
     # 查询符合条件的称号
     titles = query_titles_by_name_and_color(title_name, rarity_color)
@@ -340,18 +471,70 @@ def generate_titles_images(
         return []
 
     # 为每个称号生成图片
-    generated_images = []
-    for idx, title_data in enumerate(titles, 1):
-        # 生成文件名
+    return list(iter_generate_images(titles, store))
+
+
+def iter_generate_images(rows: Iterable[Tuple], store: ImageStore) -> Iterator[str]:
+    """
+    逐条生成称号图片（每次只持有一条记录和一张图片）
+
+    参数:
+        rows: 称号数据元组的可迭代对象（可以是数据库游标）
+        store: 图片存储
+
+    返回:
+        图片路径的迭代器，生成失败的称号对应 ""
+    """
+    for title_data in rows:
+        # 生成文件名（使用称号 id，同一称号在不同查询中文件名相同）
         safe_title_name = "".join(
             c for c in title_data[1] if c.isalnum() or c in (" ", "_", "-")
         ).strip()
         safe_title_name = safe_title_name.replace(" ", "_")
-        filename = f"{safe_title_name}_{idx}.png"
-        output_file = output_path / filename
+        filename = f"{safe_title_name}_{title_data[0]}.png"
+
+        inputs = render_inputs(title_data)
+        if inputs is None:
+            print(f"未找到称号框: {title_frame_path(title_data[3])}")
+            yield ""
+            continue
+
+        # 相同输入的图片已存在时直接复用，不重新渲染
+        key = content_key(inputs)
+        if not store.put(key, lambda path: generate_title_image(title_data, path)):
+            yield ""
+            continue
+
+        image_path = store.link(key, filename)
+        print(f"图片已生成: {image_path}")
+        yield str(image_path)
+
+
+def generate_catalog_images(
+    title_name: Optional[str] = None,
+    rarity_color: Optional[str] = None,
+    output_dir: str = "output",
+) -> int:
+    """
+    为所有符合条件的称号生成图片（不限制数量，逐行读取数据库）
+
+    参数:
+        title_name: 称号名称（可选）
+        rarity_color: 稀有度颜色（可选）
+        output_dir: 输出目录
+
+    返回:
+        成功生成的图片数量
+    """
+    store = ImageStore(output_dir)
+    rows = iter_titles_by_name_and_color(title_name, rarity_color)
+    return sum(1 for path in iter_generate_images(rows, store) if path)
+
 
-        # 生成图片
-        image_path = generate_title_image(title_data, str(output_file))
-        generated_images.append(image_path)
+if __name__ == "__main__":
+    import sys
 
-    return generated_images
+    # 为数据库中所有称号生成图片
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else "output"
+    generated = generate_catalog_images(output_dir=output_dir)
+    print(f"共生成 {generated} 张图片")
@@ -0,0 +1,184 @@
+"""
+内容寻址的图片存储
+
+图片按渲染输入的哈希保存在 {output_dir}/.blobs/ 下，
+对外可见的文件名（如 "月下打人_17.png"）是指向 blob 的硬链接（不支持时退化为符号链接或复制）。
+相同输入只渲染、写盘一次；重复查询只会更新链接。
+复制的文件无法通过链接数识别，其引用记录在 {output_dir}/.blobs/copies.json 中。
+
+清理不再被引用的 blob:
+    python image_store.py gc [output_dir]
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+BLOB_DIR_NAME = ".blobs"
+# 以复制方式提供的友好文件名 -> blob 的内容哈希
+COPIES_MANIFEST_NAME = "copies.json"
+
+
+def content_key(inputs: dict) -> str:
+    """根据渲染输入计算内容哈希"""
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path) -> str:
+    """计算文件内容哈希（用于把资源文件纳入渲染输入）"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class ImageStore:
+    """内容寻址的图片存储"""
+
+    def __init__(self, output_dir: str = "output"):
+        self.output_dir = Path(output_dir)
+        self.blob_dir = self.output_dir / BLOB_DIR_NAME
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.blob_dir / COPIES_MANIFEST_NAME
+        self._copies = self._load_copies()
+
+    def _load_copies(self) -> Dict[str, str]:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+
+    def _save_copies(self):
+        tmp_path = self.manifest_path.with_name(f"{COPIES_MANIFEST_NAME}.tmp-{os.getpid()}")
+        tmp_path.write_text(
+            json.dumps(self._copies, ensure_ascii=False, sort_keys=True), encoding="utf-8"
+        )
+        os.replace(tmp_path, self.manifest_path)
+
+    def blob_path(self, key: str) -> Path:
+        """blob 文件路径（按哈希前两位分目录）"""
+        return self.blob_dir / key[:2] / f"{key}.png"
+
+    def has(self, key: str) -> bool:
+        return self.blob_path(key).exists()
+
+    def put(self, key: str, render: Callable[[str], str]) -> Optional[Path]:
+        """
+        确保 key 对应的 blob 存在
+
+        参数:
+            key: 内容哈希
+            render: 渲染函数，接收临时输出路径，成功时返回该路径，失败时返回 ""
+
+        返回:
+            blob 路径，渲染失败时返回 None
+        """
+        blob = self.blob_path(key)
+        if blob.exists():
+            return blob
+
+        blob.parent.mkdir(exist_ok=True)
+        # 临时文件不以 .png 结尾，避免渲染期间被 gc() 当作未引用的 blob 删除
+        tmp_path = blob.with_name(f"{key}.png.tmp-{os.getpid()}")
+        try:
+            if not render(str(tmp_path)):
+                return None
+            os.replace(tmp_path, blob)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return blob
+
+    def link(self, key: str, name: str) -> Path:
+        """
+        将友好文件名指向 key 对应的 blob（已指向同一 blob 时不做任何写入）
+
+        返回:
+            友好文件名的路径
+        """
+        blob = self.blob_path(key)
+        target = self.output_dir / name
+        if _same_file(target, blob):
+            return target
+        if self._copies.get(name) == key and target.exists():
+            return target
+
+        tmp_path = target.with_name(f".{target.name}.tmp-{os.getpid()}")
+        if tmp_path.is_symlink() or tmp_path.exists():
+            tmp_path.unlink()
+        copied = False
+        try:
+            os.link(blob, tmp_path)
+        except OSError:
+            try:
+                os.symlink(os.path.relpath(blob, target.parent), tmp_path)
+            except OSError:
+                shutil.copyfile(blob, tmp_path)
+                copied = True
+        os.replace(tmp_path, target)
+
+        # 记录（或移除）复制引用，供 gc 判断 blob 是否仍被使用
+        if copied:
+            self._copies[name] = key
+            self._save_copies()
+        elif self._copies.pop(name, None) is not None:
+            self._save_copies()
+        return target
+
+    def gc(self) -> Tuple[int, int]:
+        """
+        删除没有被任何友好文件名引用的 blob
+
+        返回:
+            (删除的 blob 数量, 释放的字节数)
+        """
+        referenced = set()
+        for path in self.output_dir.iterdir():
+            if path.is_symlink():
+                referenced.add(path.resolve())
+
+        # 复制的文件: 友好文件名仍存在即视为引用对应 blob
+        copies = {
+            name: key for name, key in self._copies.items() if (self.output_dir / name).exists()
+        }
+        if copies != self._copies:
+            self._copies = copies
+            self._save_copies()
+        referenced.update(self.blob_path(key).resolve() for key in copies.values())
+
+        removed = 0
+        freed = 0
+        for blob in self.blob_dir.glob("*/*.png"):
+            stat = blob.stat()
+            # 硬链接: 除 blob 自身外还有其他链接即视为被引用
+            if stat.st_nlink > 1 or blob.resolve() in referenced:
+                continue
+            blob.unlink()
+            removed += 1
+            freed += stat.st_size
+
+        for subdir in self.blob_dir.iterdir():
+            if subdir.is_dir() and not any(subdir.iterdir()):
+                subdir.rmdir()
+
+        return removed, freed
+
+
+def _same_file(path: Path, blob: Path) -> bool:
+    try:
+        return path.exists() and os.path.samefile(path, blob)
+    except OSError:
+        return False
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "gc":
+        print("用法: python image_store.py gc [output_dir]")
+        sys.exit(1)
+
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else "output"
+    removed, freed = ImageStore(output_dir).gc()
+    print(f"已删除 {removed} 个未引用的图片，释放 {freed / 1024:.1f} KB")
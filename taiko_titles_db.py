@@ -1,9 +1,59 @@
 import sqlite3
 from datetime import datetime
+from typing import Optional
+
+from condition_parser import parse_obtain_condition
 
 # 数据库设置
 DB_NAME = "taiko_titles.db"
 
+# 默认数据来源（新AC 段位・称号一览）
+DEFAULT_SOURCE = "new_ac"
+
+# 查询返回的列（保持 8 元组格式，不包含 source 列）
+TITLE_COLUMNS = (
+    "id, title_name, is_available, rarity_color, obtain_condition, tips, "
+    "created_at, updated_at"
+)
+
+
+# 称号表结构（同一称号在不同来源中各自一行，互不覆盖）
+_TITLES_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title_name TEXT NOT NULL,
+        is_available INTEGER NOT NULL,  -- 1: 可获得, 0: 不可获得
+        rarity_color TEXT NOT NULL,  -- 稀有度颜色
+        obtain_condition TEXT NOT NULL,  -- 获得条件
+        tips TEXT,  -- 提示信息
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        source TEXT NOT NULL DEFAULT 'new_ac',  -- 数据来源（见 crawler.SOURCES）
+        UNIQUE(source, title_name, rarity_color, obtain_condition)  -- 来源+称号文本+稀有度+达成条件组合唯一
+    )
+"""
+
+
+def _migrate_titles_table(cursor):
+    """旧数据库升级: 重建 titles 表，补充 source 列并将其加入唯一键（保留原 id）"""
+    (table_sql,) = cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'titles'"
+    ).fetchone()
+    if "UNIQUE(source," in table_sql:
+        return
+
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(titles)")]
+    source_expr = "source" if "source" in columns else f"'{DEFAULT_SOURCE}'"
+
+    cursor.execute(_TITLES_DDL.format(table="titles_new"))
+    cursor.execute(f"""
+        INSERT INTO titles_new ({TITLE_COLUMNS}, source)
+        SELECT {TITLE_COLUMNS}, {source_expr} FROM titles
+    """)
+    cursor.execute("DROP TABLE titles")
+    cursor.execute("ALTER TABLE titles_new RENAME TO titles")
+    print("已升级 titles 表结构（按来源区分称号）")
+
 
 def init_database():
     """初始化数据库，创建表结构"""
@@ -11,76 +61,163 @@ def init_database():
     cursor = conn.cursor()
 
     # 创建称号表
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS titles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title_name TEXT NOT NULL,
-            is_available INTEGER NOT NULL,  -- 1: 可获得, 0: 不可获得
-            rarity_color TEXT NOT NULL,  -- 稀有度颜色
-            obtain_condition TEXT NOT NULL,  -- 获得条件
-            tips TEXT,  -- 提示信息
-            created_at TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            UNIQUE(title_name, rarity_color, obtain_condition)  -- 称号文本+稀有度+达成条件组合唯一
-        )
-    """)
+    cursor.execute(_TITLES_DDL.format(table="titles"))
+    _migrate_titles_table(cursor)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_titles_source ON titles(source)")
+
+    _create_title_conditions_table(cursor)
 
     conn.commit()
     conn.close()
     print(f"数据库 {DB_NAME} 初始化完成")
 
 
-def save_title_to_db(title_name, is_available, rarity_color, obtain_condition, tips=""):
+def _create_title_conditions_table(cursor):
+    """创建获得条件解析表（由 obtain_condition 解析得到的结构化字段）及其索引"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS title_conditions (
+            title_id INTEGER PRIMARY KEY REFERENCES titles(id) ON DELETE CASCADE,
+            song_name TEXT,  -- 曲名
+            difficulty TEXT,  -- 难度（かんたん/ふつう/むずかしい/おに/おに(裏)）
+            clear_type TEXT,  -- 达成类型（クリア/フルコンボ/ドンダフルコンボ/プレイ）
+            count INTEGER,  -- 次数阈值
+            count_unit TEXT,  -- 次数单位（回/個/連勝）
+            grade TEXT  -- 段位合格等级（合格/金合格）
+        )
+    """)
+
+    # 旧数据库升级: 补充 grade 列（以前合格等级混在 clear_type 中），并重新解析
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(title_conditions)")]
+    if "grade" not in columns:
+        cursor.execute("ALTER TABLE title_conditions ADD COLUMN grade TEXT")
+        _reparse_title_conditions(cursor)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_title_conditions_song ON title_conditions(song_name)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_title_conditions_difficulty "
+        "ON title_conditions(difficulty, clear_type)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_title_conditions_clear_type "
+        "ON title_conditions(clear_type)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_title_conditions_count "
+        "ON title_conditions(count_unit, count)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_title_conditions_grade ON title_conditions(grade)"
+    )
+
+
+def _save_title_condition(cursor, title_id, obtain_condition):
+    """解析获得条件并写入 title_conditions 表"""
+    parsed = parse_obtain_condition(obtain_condition)
+    cursor.execute(
+        """
+        INSERT OR REPLACE INTO title_conditions
+            (title_id, song_name, difficulty, clear_type, count, count_unit, grade)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+        (title_id, *parsed),
+    )
+
+
+def save_title_to_db(
+    title_name,
+    is_available,
+    rarity_color,
+    obtain_condition,
+    tips="",
+    source=DEFAULT_SOURCE,
+):
     """保存称号数据到数据库"""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
 
     now = datetime.now().isoformat()
 
-    # 检查是否已存在相同称号（称号文本+稀有度颜色+达成条件组合）
+    # 检查同一来源中是否已存在相同称号（称号文本+稀有度颜色+达成条件组合）
     cursor.execute(
-        "SELECT id FROM titles WHERE title_name = ? AND rarity_color = ? AND obtain_condition = ?",
-        (title_name, rarity_color, obtain_condition),
+        "SELECT id FROM titles WHERE source = ? AND title_name = ? "
+        "AND rarity_color = ? AND obtain_condition = ?",
+        (source, title_name, rarity_color, obtain_condition),
     )
     existing = cursor.fetchone()
 
     if existing:
-        # 更新现有记录
+        # 更新现有记录（只影响本来源的记录）
+        title_id = existing[0]
         cursor.execute(
             """
             UPDATE titles 
             SET is_available = ?, tips = ?, updated_at = ?
-            WHERE title_name = ? AND rarity_color = ? AND obtain_condition = ?
+            WHERE id = ?
         """,
-            (is_available, tips, now, title_name, rarity_color, obtain_condition),
+            (is_available, tips, now, title_id),
         )
         print(
-            f"更新称号: {title_name} (颜色: {rarity_color}, 条件: {obtain_condition[:20]}...)"
+            f"更新称号: [{source}] {title_name} (颜色: {rarity_color}, 条件: {obtain_condition[:20]}...)"
         )
     else:
         # 插入新记录
         cursor.execute(
             """
             INSERT INTO titles (title_name, is_available, rarity_color, 
-                              obtain_condition, tips, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+                              obtain_condition, tips, created_at, updated_at, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """,
-            (title_name, is_available, rarity_color, obtain_condition, tips, now, now),
+            (
+                title_name,
+                is_available,
+                rarity_color,
+                obtain_condition,
+                tips,
+                now,
+                now,
+                source,
+            ),
         )
+        title_id = cursor.lastrowid
         print(
-            f"新增称号: {title_name} (颜色: {rarity_color}, 条件: {obtain_condition[:20]}...)"
+            f"新增称号: [{source}] {title_name} (颜色: {rarity_color}, 条件: {obtain_condition[:20]}...)"
         )
 
+    _save_title_condition(cursor, title_id, obtain_condition)
+
     conn.commit()
     conn.close()
 
 
+def rebuild_title_conditions():
+    """重新解析所有称号的获得条件（用于升级已有数据库或解析规则变更后）"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+
+    _create_title_conditions_table(cursor)
+    count = _reparse_title_conditions(cursor)
+
+    conn.commit()
+    conn.close()
+    print(f"已解析 {count} 条获得条件")
+
+
+def _reparse_title_conditions(cursor) -> int:
+    """清空 title_conditions 表并重新解析所有称号，返回解析的条数"""
+    cursor.execute("DELETE FROM title_conditions")
+    rows = cursor.execute("SELECT id, obtain_condition FROM titles").fetchall()
+    for title_id, obtain_condition in rows:
+        _save_title_condition(cursor, title_id, obtain_condition)
+    return len(rows)
+
+
 def query_all_titles():
     """查询所有称号"""
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
 
-    cursor.execute("SELECT * FROM titles ORDER BY id")
+    cursor.execute(f"SELECT {TITLE_COLUMNS} FROM titles ORDER BY id")
     titles = cursor.fetchall()
 
     conn.close()
@@ -92,7 +229,7 @@ def query_available_titles():
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
 
-    cursor.execute("SELECT * FROM titles WHERE is_available = 1 ORDER BY id")
+    cursor.execute(f"SELECT {TITLE_COLUMNS} FROM titles WHERE is_available = 1 ORDER BY id")
     titles = cursor.fetchall()
 
     conn.close()
@@ -104,7 +241,10 @@ def query_titles_by_color(color):
     conn = sqlite3.connect(DB_NAME)
     cursor = conn.cursor()
 
-    cursor.execute("SELECT * FROM titles WHERE rarity_color = ? ORDER BY id", (color,))
+    cursor.execute(
+        f"SELECT {TITLE_COLUMNS} FROM titles WHERE rarity_color = ? ORDER BY id",
+        (color,),
+    )
     titles = cursor.fetchall()
 
     conn.close()
@@ -136,10 +276,133 @@ def query_titles_by_name(title_name):
     cursor = conn.cursor()
 
     cursor.execute(
-        "SELECT * FROM titles WHERE title_name = ? ORDER BY rarity_color, obtain_condition",
+        f"SELECT {TITLE_COLUMNS} FROM titles WHERE title_name = ? "
+        "ORDER BY rarity_color, obtain_condition",
         (title_name,),
     )
     titles = cursor.fetchall()
 
     conn.close()
     return titles
+
+
+def query_titles_by_source(source):
+    """根据数据来源查询称号"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+
+    cursor.execute(
+        f"SELECT {TITLE_COLUMNS} FROM titles WHERE source = ? ORDER BY id", (source,)
+    )
+    titles = cursor.fetchall()
+
+    conn.close()
+    return titles
+
+
+def query_title_counts_by_source():
+    """统计各数据来源的称号数量"""
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "SELECT source, COUNT(*) FROM titles GROUP BY source ORDER BY source"
+    )
+    counts = cursor.fetchall()
+
+    conn.close()
+    return counts
+
+
+def query_titles_by_condition(
+    song_name: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    clear_type: Optional[str] = None,
+    min_count: Optional[int] = None,
+    max_count: Optional[int] = None,
+    count_unit: Optional[str] = None,
+    grade: Optional[str] = None,
+):
+    """
+    根据解析后的获得条件查询称号（走 title_conditions 索引）
+
+    参数:
+        song_name: 曲名（精确匹配）
+        difficulty: 难度，如 "おに"
+        clear_type: 达成类型，如 "フルコンボ"
+        min_count: 次数下限（含）
+        max_count: 次数上限（含）
+        count_unit: 次数单位，如 "回"
+        grade: 段位合格等级，如 "金合格"
+
+    返回:
+        符合条件的称号列表（与 query_all_titles 相同的元组格式）
+    """
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+
+    columns = ", ".join(f"t.{column}" for column in TITLE_COLUMNS.split(", "))
+    query = (
+        f"SELECT {columns} FROM titles t "
+        "JOIN title_conditions c ON c.title_id = t.id WHERE 1=1"
+    )
+    params = []
+
+    if song_name is not None:
+        query += " AND c.song_name = ?"
+        params.append(song_name)
+    if difficulty is not None:
+        query += " AND c.difficulty = ?"
+        params.append(difficulty)
+    if clear_type is not None:
+        query += " AND c.clear_type = ?"
+        params.append(clear_type)
+    if count_unit is not None:
+        query += " AND c.count_unit = ?"
+        params.append(count_unit)
+    if min_count is not None:
+        query += " AND c.count >= ?"
+        params.append(min_count)
+    if max_count is not None:
+        query += " AND c.count <= ?"
+        params.append(max_count)
+    if grade is not None:
+        query += " AND c.grade = ?"
+        params.append(grade)
+
+    query += " ORDER BY t.id"
+
+    cursor.execute(query, params)
+    titles = cursor.fetchall()
+
+    conn.close()
+    return titles
+
+
+def query_condition_facets(field: str):
+    """
+    统计某个解析字段的取值分布
+
+    参数:
+        field: song_name / difficulty / clear_type / count_unit / grade 之一
+
+    返回:
+        [(取值, 数量), ...]，按数量降序
+    """
+    if field not in ("song_name", "difficulty", "clear_type", "count_unit", "grade"):
+        raise ValueError(f"不支持的字段: {field}")
+
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+
+    cursor.execute(f"""
+        SELECT {field}, COUNT(*) as count
+        FROM title_conditions
+        WHERE {field} IS NOT NULL
+        GROUP BY {field}
+        ORDER BY count DESC
+    """)
+    facets = cursor.fetchall()
+
+    conn.close()
+    return facets
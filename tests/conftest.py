@@ -0,0 +1,12 @@
+import pytest
+
+import taiko_titles_db
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """使用临时数据库（已初始化）"""
+    db_name = str(tmp_path / "taiko_titles.db")
+    monkeypatch.setattr(taiko_titles_db, "DB_NAME", db_name)
+    taiko_titles_db.init_database()
+    return db_name
@@ -0,0 +1,165 @@
+import sqlite3
+
+import pytest
+
+import taiko_titles_db
+from condition_parser import ParsedCondition, parse_obtain_condition
+from taiko_titles_db import (
+    query_condition_facets,
+    query_titles_by_condition,
+    rebuild_title_conditions,
+    save_title_to_db,
+)
+
+
+@pytest.mark.parametrize(
+    "condition, expected",
+    [
+        (
+            "幕末維新譚を難易度おにでフルコンボ",
+            ParsedCondition("幕末維新譚", "おに", "フルコンボ"),
+        ),
+        (
+            "4+1のそれぞれの未来を難易度むずかしいでフルコンボ",
+            ParsedCondition("4+1のそれぞれの未来", "むずかしい", "フルコンボ"),
+        ),
+        (
+            "沓の子を打つを難易度おにでドンダフルコンボ",
+            ParsedCondition("沓の子を打つ", "おに", "ドンダフルコンボ"),
+        ),
+        (
+            "SUPERNOVA(裏)をフルコンボ",
+            ParsedCondition("SUPERNOVA", "おに(裏)", "フルコンボ"),
+        ),
+        (
+            "挑戦！ホワイト超人への道をドンダフルコンボで金合格",
+            ParsedCondition("挑戦！ホワイト超人への道", None, "ドンダフルコンボ", grade="金合格"),
+        ),
+        (
+            "復活！ホワイト超人をフルコンボで合格",
+            ParsedCondition("復活！ホワイト超人", None, "フルコンボ", grade="合格"),
+        ),
+        ("復活！ホワイト名人を金合格", ParsedCondition("復活！ホワイト名人", grade="金合格")),
+        ("恋の処方箋をクリア", ParsedCondition("恋の処方箋", None, "クリア")),
+        ("さちさちにしてあげる♪をクリア", ParsedCondition("さちさちにしてあげる♪", None, "クリア")),
+        ("AIバトル演奏で800回勝利", ParsedCondition(count=800, count_unit="回")),
+        ("金冠を500個以上", ParsedCondition(count=500, count_unit="個")),
+        ("挑戦状で10連勝", ParsedCondition(count=10, count_unit="連勝")),
+        ("プレートには霧雨魔理沙が描かれている", ParsedCondition()),
+        ("", ParsedCondition()),
+    ],
+)
+def test_parse_obtain_condition(condition, expected):
+    assert parse_obtain_condition(condition) == expected
+
+
+@pytest.mark.parametrize(
+    "condition, song_name",
+    [
+        # 日期、版本等限定条件不属于曲名
+        ("2014/8/9～8/22の間にザストゥールの魔導書をクリア", "ザストゥールの魔導書"),
+        ("2025/7/30～9/28にOn-Party!をプレイ", "On-Party!"),
+        (
+            "BLUE 1.05~10.04またはGREEN 1.04~13.02で復活！ホワイト達人をクリア",
+            "復活！ホワイト達人",
+        ),
+        ("RED 5.08で太鼓チームからの挑戦！③をクリア", "太鼓チームからの挑戦！③"),
+        (
+            "マイどんの名前を「みらい」にしてらいとにんぐ ぱっしょんをフルコンボ",
+            "らいとにんぐ ぱっしょん",
+        ),
+        # 不是单一曲名
+        ("2015年9月に太鼓の達人をプレイ", None),
+        (
+            "2014/4/17～5/18の間にマリオカートアーケードグランプリDXをプレイした後に太鼓の達人をプレイ",
+            None,
+        ),
+        (
+            "1プレイ内でThe Carnivorous Carnival、Evidence of evilのどちらかと"
+            "Turquoise Tachometerを難易度おにでフルコンボ",
+            None,
+        ),
+        ("Roseシリーズ、舞シリーズの各全曲の表譜面を難易度おにでクリア", None),
+    ],
+)
+def test_qualifiers_are_not_part_of_song_name(condition, song_name):
+    assert parse_obtain_condition(condition).song_name == song_name
+
+
+def test_ordinal_play_is_not_a_count():
+    parsed = parse_obtain_condition("モモイロVer. 5回目プレイ")
+    assert parsed.count is None
+    assert parsed.count_unit is None
+
+
+def test_query_titles_by_condition(db):
+    save_title_to_db("鬼の達人", 1, "pink", "幕末維新譚を難易度おにでフルコンボ")
+    save_title_to_db("裏の達人", 1, "pink", "SUPERNOVA(裏)をフルコンボ")
+    save_title_to_db("金王冠", 0, "peru", "金冠を500個以上")
+    save_title_to_db("銀王冠", 0, "peru", "銀冠を100個以上")
+
+    titles = query_titles_by_condition(difficulty="おに", clear_type="フルコンボ")
+    assert [t[1] for t in titles] == ["鬼の達人"]
+    assert len(titles[0]) == 8
+
+    titles = query_titles_by_condition(count_unit="個", min_count=200)
+    assert [t[1] for t in titles] == ["金王冠"]
+
+    assert ("おに(裏)", 1) in query_condition_facets("difficulty")
+    with pytest.raises(ValueError):
+        query_condition_facets("tips")
+
+
+def test_query_titles_by_grade(db):
+    save_title_to_db("鬼の達人", 1, "pink", "幕末維新譚を難易度おにでフルコンボ")
+    save_title_to_db("超人", 1, "gold", "復活！ホワイト超人をフルコンボで合格")
+    save_title_to_db("金超人", 1, "gold", "復活！ホワイト超人をフルコンボで金合格")
+    save_title_to_db("金名人", 1, "gold", "復活！ホワイト名人を金合格")
+
+    # 全连与合格等级可以分别筛选
+    titles = query_titles_by_condition(clear_type="フルコンボ", grade="金合格")
+    assert [t[1] for t in titles] == ["金超人"]
+    assert [t[1] for t in query_titles_by_condition(grade="金合格")] == ["金超人", "金名人"]
+    assert [t[1] for t in query_titles_by_condition(difficulty="おに")] == ["鬼の達人"]
+
+    assert sorted(query_condition_facets("grade")) == [("合格", 1), ("金合格", 2)]
+
+
+def test_rebuild_creates_missing_table(tmp_path, monkeypatch):
+    # 模拟升级前的数据库: 只有 titles 表
+    db_name = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_name)
+    conn.execute(
+        "CREATE TABLE titles (id INTEGER PRIMARY KEY, title_name TEXT, is_available INTEGER, "
+        "rarity_color TEXT, obtain_condition TEXT, tips TEXT, created_at TEXT, updated_at TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO titles VALUES (1, '鬼の達人', 1, 'pink', "
+        "'幕末維新譚を難易度おにでフルコンボ', '', '', '')"
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(taiko_titles_db, "DB_NAME", db_name)
+
+    rebuild_title_conditions()
+
+    assert [t[0] for t in query_titles_by_condition(song_name="幕末維新譚")] == [1]
+
+
+def test_init_adds_grade_column(db):
+    # 模拟 grade 列出现之前的解析表: 合格等级混在 clear_type 中
+    save_title_to_db("金名人", 1, "gold", "復活！ホワイト名人を金合格")
+    conn = sqlite3.connect(db)
+    conn.execute("DROP TABLE title_conditions")
+    conn.execute(
+        "CREATE TABLE title_conditions (title_id INTEGER PRIMARY KEY, song_name TEXT, "
+        "difficulty TEXT, clear_type TEXT, count INTEGER, count_unit TEXT)"
+    )
+    conn.execute("INSERT INTO title_conditions VALUES (1, '復活！ホワイト名人', NULL, '金合格', NULL, NULL)")
+    conn.commit()
+    conn.close()
+
+    taiko_titles_db.init_database()
+
+    assert query_condition_facets("clear_type") == []
+    assert query_condition_facets("grade") == [("金合格", 1)]
@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+import pytest
+
+import crawler
+import taiko_titles_db
+from taiko_titles_db import (
+    init_database,
+    query_title_counts_by_source,
+    query_titles_by_name,
+    save_title_to_db,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# 页面路径 -> 保存的页面
+PAGES = {
+    "/作品/新AC/段位・称号の一覧": "new_ac_titles.html",
+    "/旧作/称号の一覧": "old_titles.html",
+}
+
+
+@pytest.fixture
+def stub_server():
+    """本地 HTTP 服务器，返回保存的页面；路径以 /flaky 开头时前两次返回 503"""
+    hits = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = unquote(self.path)
+            hits[path] = hits.get(path, 0) + 1
+
+            if path.startswith("/flaky"):
+                if hits[path] <= 2:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                path = path[len("/flaky"):]
+
+            if path not in PAGES:
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            body = (FIXTURES / PAGES[path]).read_bytes()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=UTF-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/", hits
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    monkeypatch.setattr(crawler, "SOURCES", dict(crawler.SOURCES))
+    crawler.register_source("old", "旧作/称号の一覧")
+    crawler.register_source("flaky", "flaky/旧作/称号の一覧")
+    crawler.register_source("missing", "存在しない")
+
+
+def crawl(base_url, names):
+    return crawler.crawl(names, base_url=base_url, min_interval=0.01, backoff=0.01)
+
+
+def test_parse_title_rows():
+    rows = crawler.parse_title_rows((FIXTURES / "new_ac_titles.html").read_text("utf-8"))
+
+    assert len(rows) == 7
+    assert rows[1] == ("ドン友になろうよ！", 1, "peru", "ドンだーひろばでフレンドを作る", "")
+    assert rows[2][:3] == ("月下打人", 0, "peru")
+
+
+def test_crawl_from_stub_server(db, stub_server, sources):
+    base_url, _ = stub_server
+
+    assert crawl(base_url, ["new_ac", "old"]) == {"new_ac": 7, "old": 2}
+    assert query_title_counts_by_source() == [("new_ac", 7), ("old", 2)]
+
+
+def test_sources_do_not_overwrite_each_other(db, stub_server, sources):
+    base_url, _ = stub_server
+
+    crawl(base_url, ["new_ac"])
+    crawl(base_url, ["old"])
+    crawl(base_url, ["new_ac"])
+
+    # 同一称号在两个来源中可获得状态不同，各自保留
+    versions = query_titles_by_name("月下打人")
+    assert sorted((v[2], v[5]) for v in versions) == [
+        (0, "きせかえ(きぐるみ)「おつきさま」を獲得"),
+        (1, "旧作では入手可能"),
+    ]
+
+
+def test_retry_on_server_error(db, stub_server, sources):
+    base_url, hits = stub_server
+
+    assert crawl(base_url, ["flaky"]) == {"flaky": 2}
+    assert hits["/flaky/旧作/称号の一覧"] == 3
+
+
+def test_failed_source_is_skipped(db, stub_server, sources):
+    base_url, _ = stub_server
+
+    assert crawl(base_url, ["missing", "new_ac"]) == {"new_ac": 7}
+
+
+def test_migrate_old_unique_key(tmp_path, monkeypatch):
+    # 模拟升级前的数据库: 唯一键不含 source
+    db_name = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_name)
+    conn.execute(
+        "CREATE TABLE titles (id INTEGER PRIMARY KEY AUTOINCREMENT, title_name TEXT NOT NULL, "
+        "is_available INTEGER NOT NULL, rarity_color TEXT NOT NULL, "
+        "obtain_condition TEXT NOT NULL, tips TEXT, created_at TEXT NOT NULL, "
+        "updated_at TEXT NOT NULL, UNIQUE(title_name, rarity_color, obtain_condition))"
+    )
+    conn.execute(
+        "INSERT INTO titles VALUES (5, '月下打人', 0, 'peru', '条件', '', '2024', '2024')"
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(taiko_titles_db, "DB_NAME", db_name)
+
+    init_database()
+    save_title_to_db("月下打人", 1, "peru", "条件", "", source="old")
+
+    assert query_title_counts_by_source() == [("new_ac", 1), ("old", 1)]
+    versions = query_titles_by_name("月下打人")
+    assert sorted((v[0], v[2]) for v in versions) == [(5, 0), (6, 1)]
+
+
+def test_unknown_source(db):
+    with pytest.raises(ValueError):
+        crawler.crawl(["no_such_source"])
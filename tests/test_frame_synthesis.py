@@ -0,0 +1,115 @@
+import colorsys
+import os
+import shutil
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import frame_synthesis
+from frame_synthesis import (
+    hsv_to_rgb,
+    pregenerate_frames,
+    recolor_frame,
+    rgb_to_hsv,
+    synthesize_frame,
+)
+from taiko_titles_db import save_title_to_db
+
+
+@pytest.fixture
+def generated_dir(tmp_path, monkeypatch):
+    """合成结果写入临时目录，不污染 resources/generated/"""
+    generated = tmp_path / "generated"
+    monkeypatch.setattr(frame_synthesis, "GENERATED_DIR", generated)
+    frame_synthesis._synthesize_frame.cache_clear()
+    yield generated
+    frame_synthesis._synthesize_frame.cache_clear()
+
+
+def dominant_hue(image: Image.Image) -> float:
+    """饱和不透明像素的圆周平均色相"""
+    rgba = np.asarray(image, dtype=np.float64) / 255.0
+    h, s, _ = rgb_to_hsv(rgba[..., :3])
+    mask = (rgba[..., 3] > 0.5) & (s > 0.25)
+    angles = h[mask] * 2 * np.pi
+    return (np.arctan2(np.sin(angles).mean(), np.cos(angles).mean()) / (2 * np.pi)) % 1.0
+
+
+def hue_distance(a: float, b: float) -> float:
+    return min(abs(a - b), 1 - abs(a - b))
+
+
+def test_hsv_matches_colorsys():
+    rgb = np.random.default_rng(0).random((50, 3))
+    h, s, v = rgb_to_hsv(rgb)
+
+    for i, (r, g, b) in enumerate(rgb):
+        assert np.allclose((h[i], s[i], v[i]), colorsys.rgb_to_hsv(r, g, b))
+    assert np.allclose(hsv_to_rgb(h, s, v), rgb)
+
+
+@pytest.mark.parametrize("color, target_hue", [("#6b21fe", 0.7188), ("crimson", 0.9667)])
+def test_recolor_frame(color, target_hue):
+    base = Image.open(frame_synthesis.BASE_FRAME).convert("RGBA")
+    frame = recolor_frame(color)
+
+    assert frame.mode == "RGBA"
+    assert frame.size == base.size
+    # 透明度保持不变
+    assert np.array_equal(np.asarray(frame)[..., 3], np.asarray(base)[..., 3])
+    assert hue_distance(dominant_hue(frame), target_hue) < 0.02
+
+
+def test_synthesize_frame_cached(generated_dir, monkeypatch):
+    calls = []
+    original = frame_synthesis.recolor_frame
+
+    def counting_recolor(*args, **kwargs):
+        calls.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(frame_synthesis, "recolor_frame", counting_recolor)
+
+    path = synthesize_frame("crimson")
+    assert path == generated_dir / "#crimson.png"
+    assert path.exists()
+    assert synthesize_frame("crimson") == path
+    assert calls == ["crimson"]
+
+    # 进程内缓存清空后，磁盘上的文件仍然有效
+    frame_synthesis._synthesize_frame.cache_clear()
+    assert synthesize_frame("crimson") == path
+    assert calls == ["crimson"]
+
+
+def test_unparsable_color(generated_dir):
+    assert synthesize_frame("notacolor") is None
+    assert not (generated_dir / "#notacolor.png").exists()
+
+
+def test_base_frame_update_invalidates_cache(generated_dir, tmp_path, monkeypatch):
+    base = tmp_path / "base.png"
+    shutil.copyfile(frame_synthesis.BASE_FRAME, base)
+    monkeypatch.setattr(frame_synthesis, "BASE_FRAME", base)
+
+    path = synthesize_frame("crimson")
+    before = path.read_bytes()
+
+    # 底图换成蓝色版本，修改时间推后
+    recolor_frame("#0000ff", base).save(base)
+    mtime = path.stat().st_mtime + 10
+    os.utime(base, (mtime, mtime))
+
+    assert synthesize_frame("crimson") == path
+    assert path.read_bytes() != before
+
+
+def test_pregenerate_skips_existing_frames(db, generated_dir):
+    save_title_to_db("称号A", 1, "#ded523", "条件A")
+    save_title_to_db("称号B", 1, "pink", "条件B")
+    save_title_to_db("称号C", 1, "crimson", "条件C")
+    save_title_to_db("称号D", 1, "notacolor", "条件D")
+
+    assert pregenerate_frames(db) == [generated_dir / "#crimson.png"]
+    assert sorted(os.listdir(generated_dir)) == ["#crimson.png"]
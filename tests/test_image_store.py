@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+import image_store
+from image_generator import iter_generate_images
+from image_store import ImageStore, content_key
+
+
+def render_bytes(data: bytes):
+    def render(path):
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    return render
+
+
+@pytest.fixture
+def no_links(monkeypatch):
+    """模拟既不支持硬链接也不支持符号链接的文件系统"""
+
+    def fail(*args, **kwargs):
+        raise OSError("not supported")
+
+    monkeypatch.setattr(image_store.os, "link", fail)
+    monkeypatch.setattr(image_store.os, "symlink", fail)
+
+
+def test_same_inputs_render_once(tmp_path):
+    store = ImageStore(tmp_path)
+    key = content_key({"title_name": "月下打人"})
+    calls = []
+
+    def render(path):
+        calls.append(path)
+        return render_bytes(b"png")(path)
+
+    assert store.put(key, render) == store.put(key, render) == store.blob_path(key)
+    assert len(calls) == 1
+    assert not list(store.blob_path(key).parent.glob("*.tmp-*"))
+
+
+def test_gc_during_render(tmp_path):
+    store = ImageStore(tmp_path)
+    key = content_key({"n": 1})
+
+    def render(path):
+        render_bytes(b"png")(path)
+        # 渲染进行中运行 gc，不应删除临时文件
+        assert store.gc() == (0, 0)
+        return path
+
+    assert store.put(key, render) == store.blob_path(key)
+    assert store.blob_path(key).read_bytes() == b"png"
+
+
+def test_gc_keeps_linked_blobs(tmp_path):
+    store = ImageStore(tmp_path)
+    kept = content_key({"n": 1})
+    dropped = content_key({"n": 2})
+    store.put(kept, render_bytes(b"kept"))
+    store.put(dropped, render_bytes(b"dropped"))
+    store.link(kept, "a.png")
+    store.link(dropped, "b.png")
+
+    os.remove(tmp_path / "b.png")
+
+    assert store.gc() == (1, len(b"dropped"))
+    assert store.has(kept)
+    assert not store.has(dropped)
+
+
+def test_gc_keeps_copied_blobs(tmp_path, no_links):
+    store = ImageStore(tmp_path)
+    key = content_key({"n": 1})
+    store.put(key, render_bytes(b"copied"))
+    target = store.link(key, "a.png")
+
+    assert os.stat(target).st_nlink == 1
+    assert store.gc() == (0, 0)
+    assert store.has(key)
+
+    # 重新打开存储后仍能识别复制引用
+    assert ImageStore(tmp_path).gc() == (0, 0)
+
+    os.remove(target)
+    assert ImageStore(tmp_path).gc() == (1, len(b"copied"))
+    assert not store.has(key)
+
+
+def test_copy_relinked_to_new_blob(tmp_path, no_links):
+    store = ImageStore(tmp_path)
+    old, new = content_key({"n": 1}), content_key({"n": 2})
+    store.put(old, render_bytes(b"old"))
+    store.put(new, render_bytes(b"new"))
+
+    store.link(old, "a.png")
+    target = store.link(new, "a.png")
+
+    assert target.read_bytes() == b"new"
+    assert store.gc() == (1, len(b"old"))
+    assert store.has(new)
+
+
+def test_log_friendly_path(tmp_path, capsys):
+    store = ImageStore(tmp_path)
+    title = (17, "月下打人", 0, "#ded523", "きせかえを獲得", "", None, None)
+
+    (path,) = iter_generate_images([title], store)
+
+    assert path == str(tmp_path / "月下打人_17.png")
+    out = capsys.readouterr().out
+    assert f"图片已生成: {path}" in out
+    assert ".tmp-" not in out
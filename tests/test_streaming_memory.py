@@ -0,0 +1,104 @@
+import contextlib
+import gc
+import os
+import weakref
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from image_generator import iter_generate_images
+
+# 每隔多少张采样一次
+SAMPLE_EVERY = 50
+# 允许的常驻内存增长（仅在能读取 /proc/self/statm 的平台上检查）
+RSS_GROWTH_LIMIT = 32 * 1024 * 1024
+
+
+class DiscardingStore:
+    """与 ImageStore 接口相同，但图片编码后直接丢弃，不在磁盘上累积 10 万个文件"""
+
+    def put(self, key, render):
+        return render(os.devnull) or None
+
+    def link(self, key, name):
+        return Path(name)
+
+
+def synthetic_titles(count: int):
+    """逐条生成合成称号（不预先构建列表；文本尽量短，使排版和编码的耗时最小）"""
+    for i in range(count):
+        yield (i, f"称号{i}", i % 2, "#ded523", f"曲{i}をクリア", "提示" * (i % 2), None, None)
+
+
+def current_rss():
+    """当前常驻内存（字节），无法读取时返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class LiveImages:
+    """统计仍存活的 PIL 图片对象（Image 不可哈希，不能放进 WeakSet）"""
+
+    def __init__(self):
+        self._refs = {}
+
+    def add(self, image):
+        key = id(image)
+        self._refs[key] = weakref.ref(image, lambda _, key=key: self._refs.pop(key, None))
+
+    def __len__(self):
+        return len(self._refs)
+
+
+@pytest.fixture
+def live_images(monkeypatch):
+    """跟踪所有 PIL 图片对象（像素缓冲区不在 Python 堆上，tracemalloc 看不到）"""
+    images = LiveImages()
+    original_init = Image.Image.__init__
+
+    def tracking_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        images.add(self)
+
+    monkeypatch.setattr(Image.Image, "__init__", tracking_init)
+    return images
+
+
+def check_streaming_memory(count: int, live_images: LiveImages):
+    rendered = 0
+    baseline_images = baseline_rss = None
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i, path in enumerate(iter_generate_images(synthetic_titles(count), DiscardingStore())):
+            assert path
+            rendered += 1
+            if i % SAMPLE_EVERY:
+                continue
+
+            gc.collect()
+            if baseline_images is None:
+                # 首张图片后: 字体、称号框等缓存已加载
+                baseline_images, baseline_rss = len(live_images), current_rss()
+                continue
+
+            # 编码后的图片必须立即释放，存活的图片数量只包括缓存的称号框
+            assert len(live_images) <= baseline_images, (i, len(live_images))
+            rss = current_rss()
+            if rss is not None:
+                assert rss - baseline_rss < RSS_GROWTH_LIMIT, (i, rss - baseline_rss)
+
+    assert rendered == count
+
+
+def test_streaming_memory(live_images):
+    check_streaming_memory(200, live_images)
+
+
+@pytest.mark.slow
+def test_streaming_memory_100k(live_images):
+    # 编码 PNG 约 15 ms/张，完整运行需要 25 分钟左右，默认跳过: pytest -m slow
+    check_streaming_memory(100_000, live_images)
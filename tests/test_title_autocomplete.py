@@ -0,0 +1,66 @@
+import pytest
+
+import api
+from taiko_titles_db import save_title_to_db
+from title_autocomplete import TitleAutocomplete, normalize_title
+
+
+@pytest.fixture
+def titles(db):
+    # 同名称号有多个版本: 不可获得的版本不应把可获得的版本挤出结果
+    for color in ("pink", "peru", "grey", "crimson"):
+        save_title_to_db("ピカピカ", 0, color, f"{color}の条件", "")
+    save_title_to_db("ピカピカ", 1, "gold", "goldの条件", "")
+    save_title_to_db("ピアノ", 1, "pink", "ピアノの条件", "")
+    save_title_to_db("ピーマン", 0, "pink", "ピーマンの条件", "")
+    save_title_to_db("Don't Stop the Game", 1, "pink", "条件", "")
+    return db
+
+
+def test_normalize_title():
+    assert normalize_title("ﾄﾞﾝ") == normalize_title("ドン") == "どん"
+    assert normalize_title("ＤＯＮ") == "don"
+
+
+def test_suggest_names_deduplicates_before_limit(titles):
+    engine = TitleAutocomplete.from_db(titles)
+
+    assert engine.suggest_names("ピ", 3) == ["ピカピカ", "ピアノ", "ピーマン"]
+    assert engine.suggest_names("ぴ", 2) == ["ピカピカ", "ピアノ"]
+
+
+def test_suggest_uses_best_variant(titles):
+    engine = TitleAutocomplete.from_db(titles)
+
+    (record,) = engine.suggest("ぴか", 5)
+    assert record.rarity_color == "gold"
+
+
+def test_suggest_matches_words(titles):
+    engine = TitleAutocomplete.from_db(titles)
+
+    assert engine.suggest_names("ｓｔｏｐ") == ["Don't Stop the Game"]
+    assert engine.suggest_names("") == []
+
+
+def test_refresh_picks_up_new_titles(titles):
+    engine = TitleAutocomplete.from_db(titles)
+    save_title_to_db("ピラミッド", 1, "pink", "ピラミッドの条件", "")
+    save_title_to_db("ピーマン", 1, "pink", "ピーマンの条件", "")
+
+    assert engine.refresh() == 2
+    assert engine.suggest_names("ぴら") == ["ピラミッド"]
+    assert engine.catalog.is_available(engine.suggest("ぴー")[0])
+
+
+def test_api_refresh(titles, monkeypatch):
+    monkeypatch.setattr(api, "_autocomplete", None)
+    # 索引尚未构建时无需刷新
+    assert api.refresh_title_suggestions() == 0
+
+    monkeypatch.setattr(api, "_autocomplete", TitleAutocomplete.from_db(titles))
+    assert api.suggest_titles("ぴら") == []
+
+    save_title_to_db("ピラミッド", 1, "pink", "ピラミッドの条件", "")
+    assert api.refresh_title_suggestions() == 1
+    assert api.suggest_titles("ぴら") == ["ピラミッド"]
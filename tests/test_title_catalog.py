@@ -0,0 +1,39 @@
+from taiko_titles_db import query_all_titles, save_title_to_db
+from title_catalog import TitleCatalog
+
+TIP = "期間限定イベントで入手可能"
+
+
+def test_repeated_strings_are_shared(db):
+    save_title_to_db("称号A", 1, "pink", "太鼓を50回プレイ", TIP)
+    save_title_to_db("称号B", 0, "pink", "太鼓を50回プレイ", TIP)
+    save_title_to_db("称号B", 1, "#6b21fe", "太鼓を100回プレイ", "")
+
+    catalog = TitleCatalog.from_db(db)
+    a, b, b2 = catalog.records
+
+    assert a.obtain_condition is b.obtain_condition
+    assert a.tips is b.tips
+    assert a.rarity_color is b.rarity_color
+    assert catalog.get_by_name("称号B") == [b, b2]
+    assert catalog.color_count("pink") == 2
+    assert catalog.available_count() == 2
+    assert not catalog.is_available(b)
+
+
+def test_to_tuple_matches_query(db):
+    save_title_to_db("称号A", 1, "pink", "太鼓を50回プレイ", TIP)
+
+    catalog = TitleCatalog.from_db(db)
+    (raw,) = query_all_titles()
+
+    assert catalog.to_tuple(catalog.records[0])[:6] == raw[:6]
+
+
+def test_smaller_than_raw_tuples(db):
+    for i in range(200):
+        save_title_to_db(f"称号{i}", i % 2, "pink", f"太鼓を{i}回プレイ", TIP)
+
+    footprint = TitleCatalog.from_db(db).memory_footprint(query_all_titles())
+
+    assert footprint["ratio"] < 0.85
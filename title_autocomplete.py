@@ -0,0 +1,178 @@
+"""
+称号名称自动补全
+
+在 TitleCatalog 之上建立排序数组前缀索引:
+- 索引键为规范化后的称号名称（NFKC + 小写 + 片假名转平假名），以及名称中按空白分隔的各个词
+- 前缀查找使用 bisect，在排序数组中定位 [prefix, prefix + "\\uffff") 区间
+- 结果按 可获得 > 稀有度（同色称号越少越稀有）> 名称长度 排序
+- 抓取后调用 refresh() 按 updated_at 增量更新，无需重建
+"""
+
+import heapq
+import sqlite3
+import sys
+import unicodedata
+from bisect import bisect_left
+from typing import List, Optional
+
+from taiko_titles_db import DB_NAME
+from title_catalog import TitleCatalog, TitleRecord
+
+# 片假名 → 平假名（ァ..ヶ 与 ぁ..ゖ 相差 0x60）
+_KANA_FOLD = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+
+def normalize_title(text: str) -> str:
+    """规范化称号文本: 全角/半角统一、忽略大小写、片假名折叠为平假名"""
+    return unicodedata.normalize("NFKC", text).casefold().translate(_KANA_FOLD)
+
+
+def _index_keys(title_name: str) -> List[str]:
+    """称号名称对应的所有索引键"""
+    normalized = normalize_title(title_name)
+    keys = [normalized]
+    words = normalized.split()
+    if len(words) > 1:
+        keys.extend(words[1:])
+    return keys
+
+
+class TitleAutocomplete:
+    """称号名称前缀补全引擎"""
+
+    def __init__(self, catalog: TitleCatalog, db_name: str = DB_NAME):
+        self.catalog = catalog
+        self.db_name = db_name
+        self._last_updated_at = ""
+        # 排序数组: _keys[i] 对应 _records[i]
+        self._keys: List[str] = []
+        self._records: List[TitleRecord] = []
+
+        entries = sorted(
+            (key, record.index, record)
+            for record in catalog
+            for key in _index_keys(record.title_name)
+        )
+        self._keys = [key for key, _, _ in entries]
+        self._records = [record for _, _, record in entries]
+
+    @classmethod
+    def from_db(cls, db_name: str = DB_NAME) -> "TitleAutocomplete":
+        """从数据库构建补全索引"""
+        last_updated_at = _max_updated_at(db_name)
+        engine = cls(TitleCatalog.from_db(db_name), db_name)
+        engine._last_updated_at = last_updated_at
+        return engine
+
+    def _insert(self, record: TitleRecord):
+        for key in _index_keys(record.title_name):
+            position = bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._records.insert(position, record)
+
+    def refresh(self) -> int:
+        """
+        增量更新: 读取上次刷新后新增或更新的称号
+
+        返回:
+            处理的记录数
+        """
+        conn = sqlite3.connect(self.db_name)
+        try:
+            rows = conn.execute(
+                "SELECT id, title_name, is_available, rarity_color, obtain_condition, "
+                "tips, updated_at FROM titles WHERE updated_at > ? ORDER BY id",
+                (self._last_updated_at,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        for row in rows:
+            title_id, title_name, is_available, rarity_color = row[:4]
+            obtain_condition, tips, updated_at = row[4:]
+            record = self.catalog.get_by_id(title_id)
+            if record is None:
+                record = self.catalog.add(
+                    title_id, title_name, is_available, rarity_color, obtain_condition, tips
+                )
+                self._insert(record)
+            else:
+                # 称号名称/颜色/条件构成唯一键，更新时只会改变可获得状态和提示
+                self.catalog.set_available(record, is_available)
+                record.tips = sys.intern(tips or "")
+            self._last_updated_at = max(self._last_updated_at, updated_at)
+
+        return len(rows)
+
+    def _rank(self, record: TitleRecord):
+        return (
+            not self.catalog.is_available(record),
+            self.catalog.color_count(record.rarity_color),
+            len(record.title_name),
+            record.id,
+        )
+
+    def suggest(self, prefix: str, k: int = 10) -> List[TitleRecord]:
+        """
+        根据前缀返回最多 k 个称号
+
+        参数:
+            prefix: 输入的前缀（会被规范化）
+            k: 返回数量上限
+
+        返回:
+            排序后的称号记录列表（同名称号只出现一次，取排序最靠前的版本）
+        """
+        key = normalize_title(prefix.strip())
+        if not key or k <= 0:
+            return []
+
+        start = bisect_left(self._keys, key)
+        end = bisect_left(self._keys, key + "\uffff", start)
+
+        # 同名称号有多个版本（颜色/条件/来源不同）时，按最优版本参与排序
+        best = {}
+        for record in self._records[start:end]:
+            rank = self._rank(record)
+            current = best.get(record.title_name)
+            if current is None or rank < current[0]:
+                best[record.title_name] = (rank, record)
+        return [record for _, record in heapq.nsmallest(k, best.values())]
+
+    def suggest_names(self, prefix: str, k: int = 10) -> List[str]:
+        """根据前缀返回不重复的称号名称"""
+        return [record.title_name for record in self.suggest(prefix, k)]
+
+
+def _max_updated_at(db_name: str) -> str:
+    conn = sqlite3.connect(db_name)
+    try:
+        (value,) = conn.execute("SELECT MAX(updated_at) FROM titles").fetchone()
+    finally:
+        conn.close()
+    return value or ""
+
+
+def benchmark(prefixes: Optional[List[str]] = None, k: int = 10, repeat: int = 1000):
+    """对数据库中的称号进行补全性能测试"""
+    import time
+
+    start = time.perf_counter()
+    engine = TitleAutocomplete.from_db()
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"构建索引: {len(engine.catalog)} 条称号, {len(engine._keys)} 个键, {build_ms:.2f} ms")
+
+    if prefixes is None:
+        prefixes = ["た", "太鼓", "ドン", "どん", "ｄｏｎ", "月下", "金王冠", "ﾄﾞﾝ"]
+
+    for prefix in prefixes:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results = engine.suggest(prefix, k)
+        elapsed_us = (time.perf_counter() - start) / repeat * 1_000_000
+        names = ", ".join(record.title_name for record in results[:3])
+        print(f"  {prefix!r:>10}: {elapsed_us:8.1f} µs, {len(results)} 条 ({names})")
+
+
+if __name__ == "__main__":
+    benchmark()
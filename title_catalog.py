@@ -0,0 +1,190 @@
+"""
+紧凑的内存称号目录
+
+将 titles 表整体加载到内存，供自动补全等需要频繁查询的场景使用。
+与 query_all_titles() 返回的 8 元组列表相比:
+- 每条称号使用 __slots__ 记录，不保存 created_at / updated_at
+- 称号名称、稀有度颜色、获得条件和提示使用 sys.intern 共享同一个字符串对象
+  （提示文本高度重复，1280 条称号只有约 200 种）
+- 可获得状态保存为一个整数位图（第 i 位对应第 i 条记录）
+"""
+
+import sqlite3
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from taiko_titles_db import DB_NAME
+
+
+class TitleRecord:
+    """单条称号记录（可获得状态由所属目录的位图保存）"""
+
+    __slots__ = ("index", "id", "title_name", "rarity_color", "obtain_condition", "tips")
+
+    def __init__(self, index, title_id, title_name, rarity_color, obtain_condition, tips):
+        self.index = index
+        self.id = title_id
+        self.title_name = title_name
+        self.rarity_color = rarity_color
+        self.obtain_condition = obtain_condition
+        self.tips = tips
+
+    def __repr__(self):
+        return (
+            f"TitleRecord(id={self.id}, title_name={self.title_name!r}, "
+            f"rarity_color={self.rarity_color!r})"
+        )
+
+
+class TitleCatalog:
+    """内存称号目录，支持按 id、名称、颜色快速查找"""
+
+    def __init__(self):
+        self.records: List[TitleRecord] = []
+        self._available_bits = 0
+        self._by_id: Dict[int, TitleRecord] = {}
+        # 绝大多数名称只有一个版本，用元组而不是列表（省去列表的预留空间）
+        self._by_name: Dict[str, Tuple[TitleRecord, ...]] = {}
+        self._by_color: Dict[str, List[TitleRecord]] = {}
+
+    @classmethod
+    def from_db(cls, db_name: str = DB_NAME) -> "TitleCatalog":
+        """从数据库加载目录（逐行读取，不一次性 fetchall）"""
+        catalog = cls()
+        conn = sqlite3.connect(db_name)
+        try:
+            cursor = conn.execute(
+                "SELECT id, title_name, is_available, rarity_color, obtain_condition, tips "
+                "FROM titles ORDER BY id"
+            )
+            for row in cursor:
+                catalog.add(*row)
+        finally:
+            conn.close()
+        return catalog
+
+    def add(
+        self,
+        title_id: int,
+        title_name: str,
+        is_available: int,
+        rarity_color: str,
+        obtain_condition: str,
+        tips: Optional[str] = "",
+    ) -> TitleRecord:
+        """添加一条称号记录"""
+        record = TitleRecord(
+            len(self.records),
+            title_id,
+            sys.intern(title_name),
+            sys.intern(rarity_color),
+            sys.intern(obtain_condition),
+            sys.intern(tips or ""),
+        )
+        self.records.append(record)
+        if is_available:
+            self._available_bits |= 1 << record.index
+
+        self._by_id[title_id] = record
+        self._by_name[record.title_name] = self._by_name.get(record.title_name, ()) + (record,)
+        self._by_color.setdefault(record.rarity_color, []).append(record)
+        return record
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[TitleRecord]:
+        return iter(self.records)
+
+    def is_available(self, record: TitleRecord) -> bool:
+        """称号是否可获得"""
+        return bool(self._available_bits >> record.index & 1)
+
+    def set_available(self, record: TitleRecord, is_available: int):
+        """更新称号的可获得状态"""
+        if is_available:
+            self._available_bits |= 1 << record.index
+        else:
+            self._available_bits &= ~(1 << record.index)
+
+    def color_count(self, rarity_color: str) -> int:
+        """某稀有度颜色的称号数量"""
+        return len(self._by_color.get(rarity_color, ()))
+
+    def available_count(self) -> int:
+        """可获得称号数量"""
+        return self._available_bits.bit_count()
+
+    def get_by_id(self, title_id: int) -> Optional[TitleRecord]:
+        """根据 id 查找称号"""
+        return self._by_id.get(title_id)
+
+    def get_by_name(self, title_name: str) -> List[TitleRecord]:
+        """根据称号名称查找所有版本"""
+        return list(self._by_name.get(title_name, ()))
+
+    def get_by_color(self, rarity_color: str) -> List[TitleRecord]:
+        """根据稀有度颜色查找称号"""
+        return list(self._by_color.get(rarity_color, ()))
+
+    def colors(self) -> List[str]:
+        """目录中出现的所有稀有度颜色"""
+        return list(self._by_color)
+
+    def to_tuple(self, record: TitleRecord) -> Tuple:
+        """
+        转换为与 query_all_titles() 相同格式的 8 元组
+
+        目录不保存时间戳，created_at / updated_at 为 None
+        """
+        return (
+            record.id,
+            record.title_name,
+            int(self.is_available(record)),
+            record.rarity_color,
+            record.obtain_condition,
+            record.tips,
+            None,
+            None,
+        )
+
+    def memory_footprint(self, raw_titles: Optional[List[Tuple]] = None) -> dict:
+        """
+        估算目录占用的内存，并与原始元组列表比较
+
+        参数:
+            raw_titles: query_all_titles() 的结果（可选）
+
+        返回:
+            {"catalog_bytes": int, "raw_bytes": int 或 None, "ratio": float 或 None}
+        """
+        catalog_bytes = _deep_sizeof(
+            (self.records, self._available_bits, self._by_id, self._by_name, self._by_color)
+        )
+        raw_bytes = _deep_sizeof(raw_titles) if raw_titles is not None else None
+        return {
+            "catalog_bytes": catalog_bytes,
+            "raw_bytes": raw_bytes,
+            "ratio": catalog_bytes / raw_bytes if raw_bytes else None,
+        }
+
+
+def _deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """递归计算对象占用的字节数（共享对象只计算一次）"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_sizeof(key, seen) + _deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _deep_sizeof(item, seen)
+    elif hasattr(obj, "__slots__"):
+        for slot in obj.__slots__:
+            size += _deep_sizeof(getattr(obj, slot), seen)
+    return size